@@ -0,0 +1,56 @@
+"""
+Micro-benchmark of the age binning
+
+Usage: python benchmarks/bench_agebins.py [rows ...]
+
+pd.cut with the notebook's edges against the lookup table of
+noshow.agebins, for one scheme and for every registered scheme at once.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from noshow.agebins import AGE_STAGES, SCHEMES, bin_ages  # noqa: E402
+
+
+def cut_all(ages):
+    return {name: pd.cut(ages, scheme.edges, labels=scheme.labels)
+            for name, scheme in SCHEMES.items()}
+
+
+def sample(rows, seed=0):
+    """int16 ages from 0 to 115, as loaded."""
+    return pd.Series(np.random.default_rng(seed).integers(0, 116, rows, dtype=np.int16))
+
+
+def timeit(func, ages):
+    start = time.perf_counter()
+    result = func(ages)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(arg) for arg in argv] or [110_527, 10_000_000, 50_000_000]
+    print(f'{"rows":>10}{"pd.cut (s)":>12}{"lookup (s)":>12}{"speedup":>9}'
+          f'{"cut all (s)":>13}{"lookup all (s)":>16}{"speedup":>9}')
+    for rows in sizes:
+        ages = sample(rows)
+        slow, cut = timeit(lambda a: pd.cut(a, AGE_STAGES.edges, labels=AGE_STAGES.labels), ages)
+        fast, binned = timeit(lambda a: bin_ages(a, AGE_STAGES.name), ages)
+        if not (cut.cat.codes == binned.cat.codes).all():
+            raise SystemExit('lookup and pd.cut disagree')
+        slow_all, _ = timeit(cut_all, ages)
+        fast_all, _ = timeit(bin_ages, ages)
+        print(f'{rows:>10}{slow:>12.4f}{fast:>12.4f}{slow / fast:>8.1f}x'
+              f'{slow_all:>13.4f}{fast_all:>16.4f}{slow_all / fast_all:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Throughput of the rate cube against the notebook's groupby/filter code
+
+Usage: python benchmarks/bench_cube.py [noshow.csv] [--repeat N]
+
+--repeat stacks N copies of the cleaned frame to get a bigger input.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from noshow.cache import load_clean  # noqa: E402
+from noshow.cube import build_cube  # noqa: E402
+
+
+def notebook_answers(df):
+    """The percentages of the notebook, computed the way its cells do."""
+    out = {}
+    out['age'] = df.groupby('age_stages', observed=True).no_show.sum() / df.no_show.sum() * 100
+    out['neighbourhood'] = df.groupby('neighbourhood', observed=True).no_show.sum() / df.no_show.sum() * 100
+    M = df[df['gender'] == 'M'].shape
+    F = df[df['gender'] == 'F'].shape
+    gen = df.groupby('gender', observed=True).no_show.sum()
+    out['gender'] = [gen['F'] / F[0] * 100, gen['M'] / M[0] * 100]
+    for col in ['sms_received', 'scholarship']:
+        a = df[df[col] == 1].shape
+        b = df[df[col] == 0].shape
+        sums = df.groupby(col).no_show.sum()
+        out[col] = [sums[0] / b[0] * 100, sums[1] / a[0] * 100]
+    han = df.groupby('handcap').no_show.sum().astype(float)
+    for i in range(5):
+        han[i] = han[i] / df[df['handcap'] == i].count().no_show * 100
+    out['handcap'] = han
+    sc = df.groupby('scmonth').no_show.sum()
+    out['scmonth'] = sc.values / [df[df['scmonth'] == i].count().no_show for i in sc.index] * 100
+    cols = ['hipertension', 'diabetes', 'alcoholism']
+    out['comorbidity'] = df.groupby(cols).no_show.sum() / df.groupby(cols).count().no_show * 100
+    return out
+
+
+def cube_answers(df):
+    cube = build_cube(df, crosses=[('gender', 'sms_received')])
+    return {name: cube.rates(name) for name in cube}
+
+
+def timeit(func, df, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', nargs='?', default='noshow.csv')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = load_clean(args.csv)
+    if args.repeat > 1:
+        df = pd.concat([df] * args.repeat, ignore_index=True)
+
+    print(f'{len(df)} rows')
+    for name, func in [('notebook', notebook_answers), ('cube', cube_answers)]:
+        elapsed = timeit(func, df, args.rounds)
+        print(f'{name:<10}{elapsed * 1000:>10.1f} ms{len(df) / elapsed / 1e6:>10.1f} M rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark of the +23:59 appointmentday adjustment
+
+Usage: python benchmarks/bench_end_of_day.py [rows ...]
+
+The notebook's loop (one Timestamp per row) against noshow.clean.end_of_day.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from noshow.clean import end_of_day  # noqa: E402
+
+
+def loop(times):
+    appointmentday = []
+    for value in times:
+        value += pd.Timedelta('+23:59:00')
+        appointmentday.append(value)
+    return pd.Series(appointmentday, index=times.index)
+
+
+def sample(rows, seed=0):
+    """Midnight UTC timestamps over the span of noshow.csv."""
+    rng = np.random.default_rng(seed)
+    days = np.datetime64('2016-04-29') + rng.integers(0, 41, rows).astype('timedelta64[D]')
+    return pd.Series(days.astype('datetime64[ns]')).dt.tz_localize('UTC')
+
+
+def timeit(func, times):
+    start = time.perf_counter()
+    func(times)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(arg) for arg in argv] or [110_527, 1_000_000]
+    print(f'{"rows":>10}{"loop (s)":>12}{"vectorized (s)":>16}{"local tz (s)":>14}{"speedup":>10}')
+    for rows in sizes:
+        times = sample(rows)
+        slow = timeit(loop, times)
+        fast = timeit(end_of_day, times)
+        local = timeit(lambda t: end_of_day(t, tz='America/Sao_Paulo'), times)
+        print(f'{rows:>10}{slow:>12.3f}{fast:>16.4f}{local:>14.4f}{slow / fast:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
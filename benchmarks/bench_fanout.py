@@ -0,0 +1,41 @@
+"""
+Wall time of the batch fan-out by number of worker processes
+
+Usage: python benchmarks/bench_fanout.py [noshow.csv] [--files N] [--jobs 1 2 4 ...]
+
+The same file is analysed N times (as N regional files would be) and the
+per-file tables are combined.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from noshow.batch import analyse_all, combine  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', nargs='?', default='noshow.csv')
+    parser.add_argument('--files', type=int, default=32)
+    parser.add_argument('--jobs', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args(argv)
+
+    sources = [args.csv] * args.files
+    base = None
+    print(f'{args.files} files')
+    print(f'{"jobs":>6}{"wall (s)":>10}{"speedup":>10}')
+    for jobs in args.jobs:
+        start = time.perf_counter()
+        combine(analyse_all(sources, jobs))
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print(f'{jobs:>6}{elapsed:>10.2f}{base / elapsed:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
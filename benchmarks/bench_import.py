@@ -0,0 +1,77 @@
+"""
+Import-time check of the compute-only entry points
+
+Usage: python benchmarks/bench_import.py [--repeat N]
+
+Starts every entry point in a fresh interpreter with python -X importtime
+and prints its total import time (best of --repeat runs) and the slowest
+top-level imports. Exits with 1 if an entry point pulls in a plotting
+library (or, for the scoring API, pandas): those are only imported when a
+chart is drawn.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+PLOTTING = ('matplotlib', 'seaborn', 'PIL', 'IPython')
+
+COMPUTE_MODULES = ['noshow.batch', 'noshow.cache', 'noshow.stream', 'noshow.incremental',
+                   'noshow.timeseries', 'noshow.history', 'noshow.model', 'noshow.histogram',
+                   'noshow.charts', 'noshow.sketches', 'noshow.profile',
+                   'noshow.validate', 'noshow.agebins', 'noshow.stats']
+
+#label -> (interpreter arguments, top-level packages it must not import)
+ENTRY_POINTS = {
+    'import noshow': (['-c', 'import noshow'], PLOTTING + ('pandas',)),
+    'compute modules': (['-c', 'import ' + ', '.join(COMPUTE_MODULES)], PLOTTING),
+    'noshow.scoring': (['-c', 'import noshow.scoring'], PLOTTING + ('pandas',)),
+    'noshowproject.py --help': ([os.path.join(ROOT, 'noshowproject.py'), '--help'], PLOTTING),
+    'noshow.batch --help': (['-m', 'noshow.batch', '--help'], PLOTTING),
+}
+
+
+def import_times(args):
+    """(module, self us, cumulative us) of every import of one run."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    run = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    rows = []
+    for line in run.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((name, int(own), int(cumulative)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=3, help='slowest top-level imports shown')
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f'{"entry point":<26}{"import (ms)":>12}  slowest top-level imports')
+    for label, (argv_, forbidden) in ENTRY_POINTS.items():
+        runs = [import_times(argv_) for _ in range(args.repeat)]
+        best = min(runs, key=lambda rows: sum(own for _, own, _ in rows))
+        total = sum(own for _, own, _ in best) / 1000
+        #Top-level imports are the lines without indentation before the name
+        top = sorted((row for row in best if not row[0].startswith('  ')), key=lambda row: -row[2])
+        slowest = ', '.join(f'{name.strip()} {cumulative / 1000:.0f}'
+                            for name, _, cumulative in top[:args.top])
+        print(f'{label:<26}{total:>12.0f}  {slowest}')
+        loaded = {name.strip().split('.')[0] for name, _, _ in best}
+        bad = sorted(loaded.intersection(forbidden))
+        if bad:
+            failed = True
+            print(f'{"":<26}FAIL: imports {", ".join(bad)}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
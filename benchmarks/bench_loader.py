@@ -0,0 +1,81 @@
+"""
+Load time and peak RSS of the typed loader against the bare read_csv path
+
+Usage: python benchmarks/bench_loader.py [noshow.csv]
+
+Every path runs in a fresh process so that ru_maxrss only sees that path.
+"""
+
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def bare_path(source):
+    """What noshowproject.py did before the loader."""
+    import pandas as pd
+    df = pd.read_csv(source)
+    df.drop(['PatientId', 'AppointmentID'], axis=1, inplace=True)
+    df.rename(columns=lambda x: x.lower(), inplace=True)
+    df.rename(index=str, columns={"no-show": "no_show"}, inplace=True)
+    df['no_show'] = df.no_show.replace({'Yes': 1, 'No': 0})
+    df['scheduledday'] = pd.to_datetime(df.scheduledday)
+    df['appointmentday'] = pd.to_datetime(df.appointmentday)
+    return df
+
+
+def typed_path(source):
+    from noshow.loader import load_noshow
+    return load_noshow(source)
+
+
+def typed_pyarrow_path(source):
+    from noshow.loader import load_noshow
+    return load_noshow(source, engine='pyarrow')
+
+
+PATHS = {'read_csv': bare_path, 'typed (c)': typed_path, 'typed (pyarrow)': typed_pyarrow_path}
+
+
+def _peak_rss_mb():
+    #ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+
+def _child(name, source, queue):
+    import pandas  # noqa: F401  -- import cost is not part of the measure
+    import noshow.loader  # noqa: F401
+    base = _peak_rss_mb()
+    start = time.perf_counter()
+    df = PATHS[name](source)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _peak_rss_mb() - base, df.memory_usage(deep=True).sum() / 1024 ** 2))
+
+
+def measure(name, source):
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(name, source, queue))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f'{name} failed in the child process')
+    return queue.get()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    source = argv[0] if argv else 'noshow.csv'
+    print(f'{"path":<17}{"load (s)":>10}{"peak RSS (MB)":>16}{"frame (MB)":>12}')
+    for name in PATHS:
+        elapsed, peak, frame = measure(name, source)
+        print(f'{name:<17}{elapsed:>10.3f}{peak:>16.1f}{frame:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Wall time and peak memory of every analysis stage by data size
+
+Usage: python benchmarks/bench_scaling.py [--sizes 100000 1000000 10000000 50000000]
+                                          [--data-dir DIR] [--json out.json]
+
+Synthetic files (noshow.synth, seeded) are written once into --data-dir
+and reused. Every size runs in a fresh process; the peak memory of a
+stage is the highest RSS sampled while it runs, minus the RSS before it.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+DEFAULT_SIZES = [100_000, 1_000_000, 10_000_000, 50_000_000]
+SEED = 0
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class PeakRss:
+    """Highest RSS seen while the block runs, sampled every few ms."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def stages(path):
+    """(name, function of the state) in the order of the notebook."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import io
+
+    from noshow import clean as cleaning
+    from noshow.cube import build_cube
+    from noshow.loader import load_noshow
+    from noshow.rates import DIMENSIONS
+    from noshow.timeseries import period_table
+    from noshow.validate import drop_invalid
+
+    def load(state):
+        state['df'] = load_noshow(path)
+
+    def clean(state):
+        df = drop_invalid(state['df']).reset_index(drop=True)
+        df['appointmentday'] = cleaning.end_of_day(df['appointmentday'])
+        state['df'] = cleaning.add_months(df)
+
+    def age_binning(state):
+        cleaning.add_age_stages(state['df'])
+
+    def breakdown(name):
+        return lambda state: build_cube(state['df'], {name: DIMENSIONS[name]})
+
+    def month(state):
+        period_table(state['df'], 'scheduledday', 'M')
+
+    def plotting(state):
+        df = state['df']
+        fig, ax = plt.subplots()
+        df.age[df.no_show == 0].hist(ax=ax, alpha=0.5, label='show up')
+        df.age[df.no_show == 1].hist(ax=ax, alpha=0.5, label='no show')
+        build_cube(df, {'age_stages': ['age_stages']}).rates('age_stages').share.plot(kind='bar', ax=ax)
+        fig.savefig(io.BytesIO(), format='png')
+        plt.close(fig)
+
+    return [('load', load), ('clean', clean), ('age binning', age_binning)] + \
+        [(name, breakdown(name)) for name in
+         ['neighbourhood', 'gender', 'sms_received', 'scholarship', 'handcap', 'comorbidity']] + \
+        [('month', month), ('plotting', plotting)]
+
+
+def run_size(path, queue):
+    import pandas  # noqa: F401
+    import noshow.cube  # noqa: F401
+    state = {}
+    records = []
+    for name, func in stages(path):
+        with PeakRss() as rss:
+            start = time.perf_counter()
+            func(state)
+            elapsed = time.perf_counter() - start
+        records.append({'stage': name, 'seconds': elapsed, 'peak_mb': (rss.peak - rss.start) / 2 ** 20})
+    queue.put(records)
+
+
+def synthetic_file(data_dir, rows):
+    from noshow.synth import write_csv
+    path = os.path.join(data_dir, f'noshow_synth_{rows}_{SEED}.csv')
+    if not os.path.exists(path):
+        print(f'generating {rows} rows into {path}', flush=True)
+        write_csv(path + '.tmp', rows, seed=SEED)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'noshow_bench'))
+    parser.add_argument('--json', help='also write the measurements here')
+    args = parser.parse_args(argv)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    ctx = mp.get_context('spawn')
+    results = {}
+    for rows in args.sizes:
+        path = synthetic_file(args.data_dir, rows)
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_size, args=(path, queue))
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            print(f'{rows} rows: failed (exit code {proc.exitcode}, likely out of memory)')
+            continue
+        results[rows] = queue.get()
+        print(f'\n{rows} rows')
+        print(f'{"stage":<16}{"time (s)":>10}{"peak (MB)":>12}')
+        for record in results[rows]:
+            print(f'{record["stage"]:<16}{record["seconds"]:>10.3f}{record["peak_mb"]:>12.1f}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Latency benchmark of noshow.scoring
+
+Usage: python benchmarks/bench_scoring.py [noshow.csv] [--model noshow_model.npz] [--repeat N]
+
+Scores batches of 1, 100 and 10k records read from noshow.csv (dicts of
+strings, as a scheduling system would send them) and prints the p50 and
+p99 latency of a call and the records scored per second. Without
+--model a one-epoch model is trained first.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from noshow.scoring import Scorer  # noqa: E402
+
+BATCH_SIZES = [1, 100, 10_000]
+
+
+def latencies(scorer, records, batch, repeat, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = rng.integers(0, len(records) - batch + 1)
+        sample = records[start:start + batch]
+        tick = time.perf_counter()
+        scorer.score(sample)
+        times[i] = time.perf_counter() - tick
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default='noshow.csv')
+    parser.add_argument('--model', default=None, help='.npz saved by noshow.model')
+    parser.add_argument('--repeat', type=int, default=1000, help='calls per batch size')
+    args = parser.parse_args(argv)
+
+    model = args.model
+    if model is None:
+        from noshow.model import train
+        model = os.path.join(tempfile.mkdtemp(), 'model.npz')
+        train(args.source, epochs=1)[0].save(model)
+    scorer = Scorer(model)
+    with open(args.source, newline='', encoding='utf-8') as f:
+        records = list(csv.DictReader(f))
+
+    print(f'{"batch":>8}{"p50 (ms)":>12}{"p99 (ms)":>12}{"records/s":>14}')
+    for batch in BATCH_SIZES:
+        repeat = max(10, min(args.repeat, args.repeat * 100 // batch))
+        times = latencies(scorer, records, batch, repeat)
+        p50, p99 = np.percentile(times, [50, 99]) * 1000
+        print(f'{batch:>8}{p50:>12.3f}{p99:>12.3f}{batch / np.median(times):>14,.0f}')
+
+
+if __name__ == '__main__':
+    main()
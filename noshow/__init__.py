@@ -0,0 +1,31 @@
+"""
+No-show appointments analysis package
+Name: Lucas Amorim Bonini
+"""
+
+import importlib
+
+#Public name -> module. Imported on first use, so that running a module
+#with python -m does not import it twice
+_EXPORTS = {
+    'load_noshow': 'noshow.loader',
+    'read_noshow': 'noshow.loader',
+    'load_clean': 'noshow.cache',
+    'stream_rates': 'noshow.stream',
+    'build_cube': 'noshow.cube',
+    'period_rates': 'noshow.timeseries',
+    'level_rates': 'noshow.rates',
+    'load_history': 'noshow.history',
+    'LogisticModel': 'noshow.model',
+    'Scorer': 'noshow.scoring',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,109 @@
+"""
+Age binning by lookup table
+
+A bin scheme is given by the first whole age of every stage and the last
+age of the last one, so age 0 is in the first stage by construction (no
+-0.1 edge). It is compiled into a dense uint8 table indexed by age that
+holds the category code of every age, NO_STAGE outside the scheme.
+Binning is then one fancy-indexing operation instead of a pd.cut.
+
+The schemes in SCHEMES are stacked into one table, so bin_ages() gives
+the stages of several schemes from the same indexing pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+#Code of the ages outside a scheme; as int8 it is the -1 of a missing category
+NO_STAGE = np.uint8(255)
+
+
+class AgeScheme:
+    """Stages of whole ages: stage i covers starts[i] up to the next start - 1."""
+
+    def __init__(self, name, starts, last, labels):
+        if len(starts) != len(labels) or len(labels) >= NO_STAGE:
+            raise ValueError(f'{name}: one label per start, fewer than {NO_STAGE}')
+        if list(starts) != sorted(set(starts)) or starts[0] < 0 or last < starts[-1]:
+            raise ValueError(f'{name}: starts must increase from 0 or more up to last')
+        self.name = name
+        self.starts = list(starts)
+        self.last = last
+        self.labels = list(labels)
+        self.dtype = pd.CategoricalDtype(self.labels, ordered=True)
+
+    @property
+    def edges(self):
+        """The same bins as right-closed pd.cut edges, e.g. for noshow.scoring."""
+        return [start - 1 for start in self.starts] + [self.last]
+
+    def table(self, size=None):
+        """uint8 code of every age from 0 to size - 1 (last + 1 by default)."""
+        size = self.last + 1 if size is None else size
+        table = np.full(size, NO_STAGE, dtype=np.uint8)
+        ends = self.starts[1:] + [self.last + 1]
+        for code, (start, end) in enumerate(zip(self.starts, ends)):
+            table[start:min(end, size)] = code
+        return table
+
+
+SCHEMES = {}
+
+#Compiled tables by tuple of scheme names
+_TABLES = {}
+
+
+def register(scheme):
+    SCHEMES[scheme.name] = scheme
+    _TABLES.clear()
+    return scheme
+
+
+#The stages of the analysis (see noshow.clean)
+AGE_STAGES = register(AgeScheme('age_stages', [0, 10, 17, 26, 36, 51, 66, 76], 115,
+                                 ['Child(0-9)', 'Adolescent(10-16)', 'Young(17 - 25)',
+                                  'Adult(26-35)', 'Mature(36-50)', 'Ageing(51-65)',
+                                  'Old(65-75)', 'Elderly(76-115)']))
+
+#The same bins with plain labels, as first tried in the notebook
+register(AgeScheme('age_groups', [0, 10, 17, 26, 36, 51, 66, 76], 115,
+                   ['0 - 9', '10 - 16', '17 - 25', '26 - 35', '36 - 50', '51 - 65',
+                    '65 - 75', '76 - 115']))
+
+#The coarser bands of noshowproject.py
+register(AgeScheme('age_bands', [0, 19, 36, 61, 91], 120,
+                   ['Unborn - 18', '18 - 35', '35 - 60', '60 - 90', '90 - 120']))
+
+
+def compile_schemes(names):
+    """uint8 table of schemes x ages, with one NO_STAGE column past the oldest age."""
+    key = tuple(names)
+    if key not in _TABLES:
+        schemes = [SCHEMES[name] for name in key]
+        size = max(scheme.last for scheme in schemes) + 2
+        _TABLES[key] = np.stack([scheme.table(size) for scheme in schemes])
+    return _TABLES[key]
+
+
+def age_codes(ages, table):
+    """int8 codes of ages in every scheme of table, -1 outside a scheme."""
+    ages = np.asarray(ages)
+    #Negative ages land on -1 and too old ones on the last column: both NO_STAGE
+    index = np.clip(ages, -1, table.shape[1] - 1).astype(np.intp, copy=False)
+    return table[:, index].view(np.int8)
+
+
+def bin_ages(ages, names=None):
+    """{scheme name: categorical Series of stages} of every scheme in names.
+
+    names is one scheme name, a list of them or None for all of SCHEMES;
+    with one name the Series itself is returned.
+    """
+    single = isinstance(names, str)
+    names = [names] if single else list(SCHEMES if names is None else names)
+    index = ages.index if isinstance(ages, pd.Series) else None
+    codes = age_codes(ages, compile_schemes(names))
+    stages = {name: pd.Series(pd.Categorical.from_codes(row, dtype=SCHEMES[name].dtype),
+                              index=index, name=name)
+              for name, row in zip(names, codes)}
+    return stages[names[0]] if single else stages
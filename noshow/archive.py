@@ -0,0 +1,161 @@
+"""
+Streaming noshow.csv out of zip and rar archives
+
+The data ships as "send for evaluation/noshow.zip", "no-show.rar" and
+"send for evaluation 2 (final)/nowshow_v2.zip", each with notebooks next
+to the CSV. The CSV member is picked automatically (noshow.csv, else the
+largest .csv) and decompressed incrementally into the parser; nothing is
+extracted to disk. A member can also be named explicitly with
+"archive.zip::member.csv".
+
+Zip is read with the standard library. Rar is read with the rarfile
+package when it is installed, else by piping the member out of the
+first of unrar, bsdtar or 7z found on the PATH.
+"""
+
+import contextlib
+import os
+import shutil
+import subprocess
+import zipfile
+
+MEMBER_SEPARATOR = '::'
+DEFAULT_MEMBER = 'noshow.csv'
+RAR_MAGIC = b'Rar!\x1a\x07'
+
+#tool -> (list command, print-member-to-stdout command)
+RAR_TOOLS = {
+    'unrar': (['unrar', 'lb'], ['unrar', 'p', '-inul']),
+    'bsdtar': (['bsdtar', '-tvf'], ['bsdtar', '-xOf']),
+    '7z': (['7z', 'l', '-ba'], ['7z', 'x', '-so']),
+}
+
+
+def split_source(source):
+    """'archive.zip::member.csv' -> ('archive.zip', 'member.csv'); member is None otherwise."""
+    source = os.fspath(source)
+    path, sep, member = source.partition(MEMBER_SEPARATOR)
+    if sep and os.path.isfile(path):
+        return path, member
+    return source, None
+
+
+def archive_kind(path):
+    """'zip', 'rar' or None for anything else (a plain CSV)."""
+    if not os.path.isfile(path):
+        return None
+    if zipfile.is_zipfile(path):
+        return 'zip'
+    with open(path, 'rb') as f:
+        if f.read(len(RAR_MAGIC)) == RAR_MAGIC:
+            return 'rar'
+    return None
+
+
+def pick_member(members):
+    """The CSV to read from {name: size or None}: noshow.csv, else the largest .csv."""
+    csvs = {name: size for name, size in members.items()
+            if name.lower().endswith('.csv') and not name.endswith('/')}
+    for name in csvs:
+        if os.path.basename(name) == DEFAULT_MEMBER:
+            return name
+    if not csvs:
+        raise ValueError(f'no .csv member among {sorted(members)}')
+    return max(csvs, key=lambda name: csvs[name] or 0)
+
+
+def _rar_tool():
+    for tool in RAR_TOOLS:
+        if shutil.which(tool):
+            return tool
+    raise RuntimeError('reading rar archives needs the rarfile package or one of '
+                       + ', '.join(RAR_TOOLS))
+
+
+def _parse_listing(tool, output):
+    members = {}
+    for line in output.splitlines():
+        if tool == 'unrar':
+            members[line] = None
+        elif tool == 'bsdtar':
+            fields = line.split(None, 8)
+            if len(fields) == 9:
+                members[fields[8]] = int(fields[4])
+        else:
+            fields = line.split(None, 5)
+            if len(fields) == 6 and fields[3].isdigit():
+                members[fields[5]] = int(fields[3])
+    return members
+
+
+def list_members(path):
+    """{member name: uncompressed size (None when unknown)} of an archive."""
+    kind = archive_kind(path)
+    if kind == 'zip':
+        with zipfile.ZipFile(path) as archive:
+            return {info.filename: info.file_size for info in archive.infolist()}
+    if kind != 'rar':
+        raise ValueError(f'{path} is not a zip or rar archive')
+    try:
+        import rarfile
+    except ImportError:
+        tool = _rar_tool()
+        listing = subprocess.run(RAR_TOOLS[tool][0] + [path], check=True,
+                                 capture_output=True, text=True).stdout
+        return _parse_listing(tool, listing)
+    with rarfile.RarFile(path) as archive:
+        return {info.filename: info.file_size for info in archive.infolist()}
+
+
+@contextlib.contextmanager
+def _pipe_member(path, member):
+    tool = _rar_tool()
+    proc = subprocess.Popen(RAR_TOOLS[tool][1] + [path, member],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    drained = False
+    try:
+        yield proc.stdout
+        #A reader that stops early (nrows) makes the tool fail on the closed
+        #pipe, so its exit code only counts when the stream was read to the end
+        drained = not proc.stdout.read(1)
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+    if drained and proc.returncode != 0:
+        raise RuntimeError(f'{tool} failed with exit code {proc.returncode} on {path}')
+
+
+@contextlib.contextmanager
+def open_member(path, member=None):
+    """Binary stream of a member of a zip or rar archive, picked if not given."""
+    kind = archive_kind(path)
+    if member is None:
+        member = pick_member(list_members(path))
+    if kind == 'zip':
+        with zipfile.ZipFile(path) as archive, archive.open(member) as f:
+            yield f
+        return
+    try:
+        import rarfile
+    except ImportError:
+        with _pipe_member(path, member) as f:
+            yield f
+        return
+    with rarfile.RarFile(path) as archive, archive.open(member) as f:
+        yield f
+
+
+@contextlib.contextmanager
+def open_source(source):
+    """What to hand to read_csv for source: the path itself, or a member stream."""
+    if not isinstance(source, (str, bytes, os.PathLike)):
+        yield source
+        return
+    path, member = split_source(source)
+    if archive_kind(path) is None:
+        yield path
+        return
+    with open_member(path, member) as f:
+        yield f
@@ -0,0 +1,176 @@
+"""
+Non-interactive batch run of the no-show analysis
+
+Usage: python -m noshow.batch INPUT [INPUT ...] [-o results.json] [-j JOBS]
+
+INPUT is a CSV, a zip or rar archive holding it (see noshow.archive) or a
+directory searched for them. Every file is read in chunks, cleaned and aggregated in its own
+worker process; the rate tables of all files are written to one JSON or
+Parquet file (by the extension of --output).
+
+With --profile a data profile of every file as read, before cleaning,
+is gathered from the same chunks and written as JSON (see noshow.profile).
+
+With --combine the tables of all files are also merged into one
+'combined' report. The merge adds the counts and no-shows of every key,
+so it is exact: the rates are recomputed, never averaged.
+
+Every rate comes with its 95% Wilson interval, rate_low and rate_high
+(see noshow.stats).
+"""
+
+import argparse
+import json
+import os
+import sys
+from functools import partial
+
+import pandas as pd
+
+from noshow.archive import split_source
+from noshow.clean import clean
+from noshow.loader import default_source, iter_noshow
+from noshow.cube import RateCube
+from noshow.profile import Profile, write_profiles
+from noshow.stats import wilson_interval, with_wilson
+from noshow.stream import RateAccumulator
+
+INPUT_EXTENSIONS = ('.csv', '.zip', '.rar')
+
+
+def find_inputs(paths):
+    """The files named in paths, directories expanded (sorted, not recursive)."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(INPUT_EXTENSIONS)))
+        else:
+            found.append(path)
+    return found
+
+
+def analyse(source, chunksize=100_000, profile=False):
+    """Rate cube and totals of one file, and its Profile before cleaning if asked."""
+    acc = RateAccumulator()
+    raw = Profile(source) if profile else None
+    rows = no_show = 0
+    for chunk in iter_noshow(source, chunksize=chunksize):
+        if raw is not None:
+            raw.update(chunk)
+        chunk = clean(chunk)
+        acc.update(chunk)
+        rows += len(chunk)
+        no_show += int(chunk['no_show'].sum())
+    return {'source': source, 'rows': rows, 'no_show': no_show, 'cube': acc.cube,
+            'profile': raw}
+
+
+def _largest_first(sources):
+    """Positions of sources, biggest file first, so no worker is left with one at the end."""
+    return sorted(range(len(sources)), key=lambda i: -os.path.getsize(split_source(sources[i])[0]))
+
+
+def analyse_all(sources, jobs=None, chunksize=100_000, profile=False):
+    """analyse() every source in a process pool, results in input order."""
+    work = partial(analyse, chunksize=chunksize, profile=profile)
+    if jobs == 1 or len(sources) <= 1:
+        return [work(source) for source in sources]
+    #Imported here: multiprocessing costs a share of the startup of a serial run
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {i: pool.submit(work, sources[i]) for i in _largest_first(sources)}
+        return [futures[i].result() for i in range(len(sources))]
+
+
+def combine(results, source='combined'):
+    """One result holding the sum of the counts of all results."""
+    cube = RateCube()
+    for result in results:
+        cube.merge(result['cube'])
+    return {'source': source,
+            'rows': sum(result['rows'] for result in results),
+            'no_show': sum(result['no_show'] for result in results),
+            'cube': cube}
+
+
+def _key(value):
+    return '/'.join(map(str, value)) if isinstance(value, tuple) else str(value)
+
+
+def long_frame(results):
+    """One row per source, dimension and key: count, no_show and rate."""
+    frames = []
+    for result in results:
+        for name in result['cube']:
+            table = result['cube'][name]
+            frames.append(pd.DataFrame({'source': result['source'],
+                                        'dimension': name,
+                                        'key': [_key(value) for value in table.index],
+                                        'count': table['count'].to_numpy(),
+                                        'no_show': table['no_show'].to_numpy()}))
+    frame = pd.concat(frames, ignore_index=True)
+    frame['rate'] = frame['no_show'] / frame['count'] * 100
+    frame['rate_low'], frame['rate_high'] = wilson_interval(frame['no_show'], frame['count'])
+    return frame
+
+
+def _records(table):
+    if isinstance(table.index, pd.PeriodIndex):
+        table = table.set_axis(table.index.astype(str))
+    table = with_wilson(table).reset_index()
+    return json.loads(table.to_json(orient='records'))
+
+
+def write_results(results, output):
+    if output.endswith('.parquet'):
+        long_frame(results).to_parquet(output, index=False)
+        return
+    document = [{'source': result['source'],
+                 'rows': result['rows'],
+                 'no_show': result['no_show'],
+                 'tables': {name: _records(result['cube'][name]) for name in result['cube']}}
+                for result in results]
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=1, ensure_ascii=False)
+
+
+def add_arguments(parser):
+    parser.add_argument('inputs', nargs='*',
+                        help='CSV files, zip/rar archives or directories of them')
+    parser.add_argument('-o', '--output', default='noshow_results.json',
+                        help='.json or .parquet file to write')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--combine', action='store_true',
+                        help="add a 'combined' report merging the counts of all inputs")
+    parser.add_argument('--profile', metavar='PATH', default=None,
+                        help='also write a JSON profile of every input before cleaning')
+
+
+def run(args):
+    sources = find_inputs(args.inputs or [default_source()])
+    if not sources:
+        print('no input files found', file=sys.stderr)
+        return 1
+    results = analyse_all(sources, args.jobs, args.chunksize, profile=bool(args.profile))
+    if args.profile:
+        print(f"profile written to {write_profiles([r['profile'] for r in results], args.profile)}")
+    if args.combine:
+        results.append(combine(results))
+    write_results(results, args.output)
+    for result in results:
+        print(f"{result['source']}: {result['rows']} appointments, {result['no_show']} no-shows")
+    print(f'results written to {args.output}')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Columnar cache of the cleaned no-show frame
+
+The cleaned frame is stored as an uncompressed Feather file next to the
+CSV, under a key made of the CSV's SHA-256 and CLEAN_VERSION, and read
+back memory-mapped. A changed CSV or a new cleaning version simply
+misses the cache; the stale files are removed on the next rebuild.
+
+Usage: python -m noshow.cache [noshow.csv | archive] [--rebuild]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+import warnings
+
+from noshow.archive import split_source
+from noshow.clean import CLEAN_VERSION, clean
+from noshow.loader import default_source, load_noshow
+
+BLOCK_SIZE = 1 << 20
+KEY_DIGITS = 16
+
+
+def file_digest(path):
+    """SHA-256 of the file contents, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stem(source):
+    path, member = split_source(source)
+    stem = os.path.splitext(os.path.abspath(path))[0]
+    if member:
+        stem += '.' + os.path.splitext(os.path.basename(member))[0]
+    return stem
+
+
+def source_digest(source):
+    """file_digest(), remembered in a sidecar while size and mtime stay the same.
+
+    For an archive this is the hash of the archive file.
+    """
+    path = split_source(source)[0]
+    stat = os.stat(path)
+    sidecar = _stem(source) + '.cache.json'
+    try:
+        with open(sidecar) as f:
+            seen = json.load(f)
+        if (seen['size'], seen['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return seen['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+    digest = file_digest(path)
+    try:
+        with open(sidecar, 'w') as f:
+            json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}, f)
+    except OSError:
+        pass  #read-only data directory, the hash is just recomputed next time
+    return digest
+
+
+def cache_key(source):
+    return f'{source_digest(source)[:KEY_DIGITS]}-v{CLEAN_VERSION}'
+
+
+def cache_path(source, key=None):
+    return f'{_stem(source)}.{key or cache_key(source)}.feather'
+
+
+def _stale_caches(source, keep):
+    pattern = glob.escape(_stem(source)) + '.' + '?' * KEY_DIGITS + '-v*.feather'
+    return [path for path in glob.glob(pattern) if path != keep]
+
+
+def load_clean(source=None, rebuild=False):
+    """Cleaned frame for source, from the cache when it is up to date."""
+    source = source or default_source()
+    try:
+        from pyarrow import feather
+    except ImportError:
+        warnings.warn('pyarrow is not installed, the cleaned frame is not cached')
+        return clean(load_noshow(source))
+
+    path = cache_path(source)
+    if not rebuild and os.path.exists(path):
+        return feather.read_table(path, memory_map=True).to_pandas()
+
+    df = clean(load_noshow(source))
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        feather.write_feather(df, tmp, compression='uncompressed')
+        os.replace(tmp, path)
+    except OSError as err:
+        warnings.warn(f'could not write the cache {path}: {err}')
+        return df
+    for stale in _stale_caches(source, path):
+        os.remove(stale)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', nargs='?', default=None)
+    parser.add_argument('--rebuild', action='store_true', help='ignore and rewrite the cache')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    source = args.csv or default_source()
+    df = load_clean(source, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    print(f'{len(df)} rows in {elapsed * 1000:.1f} ms ({cache_path(source)})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Headless chart rendering from the aggregate tables
+
+Every chart of the notebook is drawn from a small table of counts (see
+noshow.cube), never from the raw frame, so the data is read once and the
+charts cost nothing in its size. The charts are rendered to PNG files
+with the Agg backend in a process pool, and every file is named by a
+hash of the data and the spec of its chart: a chart whose numbers did
+not change is not drawn again. An index.html links the images instead
+of embedding them.
+
+Usage: python -m noshow.charts [noshow.csv | archive] [-o charts] [-j JOBS]
+"""
+
+import argparse
+import glob
+import hashlib
+import html
+import os
+import time
+
+import pandas as pd
+
+from noshow.clean import clean
+from noshow.cube import RateCube, build_cube
+from noshow.histogram import plot_split
+from noshow.loader import iter_noshow
+from noshow.rates import DIMENSIONS, with_rates
+from noshow.timeseries import fill_span, period_table
+from noshow.topk import top_k
+
+#Bumped when the drawing code changes, to redraw every cached chart
+RENDER_VERSION = '2'
+
+#The breakdowns plus age in years, for the age histograms
+CHART_DIMENSIONS = dict(DIMENSIONS, age=['age'])
+
+#name -> table, value drawn, kind and title. Like the notebook, the age
+#stages show the share of all no-shows, the others the rate
+CHARTS = {
+    'age': {'table': 'age', 'kind': 'hist', 'title': 'Age of people who show up and who do not'},
+    'age_stages': {'table': 'age_stages', 'value': 'share', 'kind': 'bar',
+                   'title': 'Share of the no-shows by age stage (%)'},
+    'neighbourhood': {'table': 'neighbourhood', 'value': 'share', 'kind': 'pie', 'top': 5,
+                      'title': 'Share of the no-shows by neighbourhood (%)'},
+    'gender': {'table': 'gender', 'value': 'rate', 'kind': 'bar',
+               'labels': {'F': 'Female', 'M': 'Male'}, 'title': 'No-show rate by gender (%)'},
+    'sms_received': {'table': 'sms_received', 'value': 'rate', 'kind': 'bar',
+                     'labels': {0: 'Not Received', 1: 'Received'},
+                     'title': 'No-show rate by SMS (%)'},
+    'scholarship': {'table': 'scholarship', 'value': 'rate', 'kind': 'bar',
+                    'labels': {0: 'Not Received', 1: 'Received'},
+                    'title': 'No-show rate by Bolsa Familia (%)'},
+    'handcap': {'table': 'handcap', 'value': 'rate', 'kind': 'bar',
+                'title': 'No-show rate by number of disabilities (%)'},
+    'month': {'table': 'month', 'value': 'rate', 'kind': 'bar',
+              'title': 'No-show rate by month of scheduling (%)'},
+    'lead_stages': {'table': 'lead_stages', 'value': 'rate', 'kind': 'bar',
+                    'title': 'No-show rate by waiting time (%)'},
+    'comorbidity': {'table': 'comorbidity', 'value': 'rate', 'kind': 'bar',
+                    'title': 'No-show rate by hipertension, diabetes, alcoholism (%)'},
+}
+
+
+def add_tables(cube, df):
+    """Add the chart tables of a cleaned chunk to cube."""
+    chunk = build_cube(df, CHART_DIMENSIONS)
+    chunk.tables['month'] = period_table(df, 'scheduledday', 'M')
+    cube.merge(chunk)
+    return cube
+
+
+def chart_tables(source=None, chunksize=100_000):
+    """The tables of every chart, read from a file chunk by chunk."""
+    cube = RateCube()
+    for chunk in iter_noshow(source, chunksize=chunksize):
+        add_tables(cube, clean(chunk))
+    if 'month' in cube.tables:
+        cube.tables['month'] = fill_span(cube.tables['month'])
+    return {name: cube[name] for name in cube}
+
+
+def _label(key):
+    return ', '.join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+def chart_data(spec, table):
+    """The small frame or series a chart draws, with text labels."""
+    if spec['kind'] == 'hist':
+        return table[['count', 'no_show']]
+    if isinstance(table.index, pd.PeriodIndex):
+        table = table.set_axis(table.index.strftime('%b/%y'))
+    data = with_rates(table)[spec['value']]
+    if 'top' in spec:
+        data = top_k(data, spec['top'])
+    data = data.rename(spec.get('labels', {}))
+    data.index = [_label(key) for key in data.index]
+    return data
+
+
+def chart_key(spec, data):
+    """Hash of what a chart shows, the name of its cached image."""
+    digest = hashlib.sha256()
+    digest.update(RENDER_VERSION.encode())
+    digest.update(repr(sorted(spec.items())).encode())
+    digest.update(data.to_json(orient='split', double_precision=15).encode())
+    return digest.hexdigest()[:16]
+
+
+def render(spec, data, path):
+    """Draw one chart to path; returns the seconds it took."""
+    start = time.perf_counter()
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 8) if spec['kind'] == 'pie' else (8, 5))
+    if spec['kind'] == 'hist':
+        plot_split(data, ax)
+    elif spec['kind'] == 'pie':
+        data.plot.pie(ax=ax, autopct='%.1f%%')
+        ax.set_ylabel('')
+    else:
+        data.plot(kind=spec['kind'], ax=ax)
+    ax.set_title(spec['title'])
+    fig.tight_layout()
+    tmp = f'{path}.{os.getpid()}.tmp.png'
+    fig.savefig(tmp)
+    plt.close(fig)
+    os.replace(tmp, path)
+    return time.perf_counter() - start
+
+
+def render_charts(tables, output='charts', jobs=None, charts=CHARTS):
+    """Render the charts whose tables are given, skipping the cached ones.
+
+    Returns name -> (image path, seconds spent drawing it, 0 if cached).
+    Older images of the same charts are removed.
+    """
+    os.makedirs(output, exist_ok=True)
+    todo = {}
+    done = {}
+    for name, spec in charts.items():
+        if spec['table'] not in tables:
+            continue
+        data = chart_data(spec, tables[spec['table']])
+        path = os.path.join(output, f'{name}.{chart_key(spec, data)}.png')
+        for old in glob.glob(os.path.join(glob.escape(output), name + '.' + '?' * 16 + '.png')):
+            if old != path:
+                os.remove(old)
+        if os.path.exists(path):
+            done[name] = (path, 0.0)
+        else:
+            todo[name] = (spec, data, path)
+
+    if jobs == 1 or len(todo) <= 1:
+        for name, (spec, data, path) in todo.items():
+            done[name] = (path, render(spec, data, path))
+    else:
+        #A fully cached run never gets here and skips the multiprocessing import
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {name: pool.submit(render, *args) for name, args in todo.items()}
+            for name, future in futures.items():
+                done[name] = (todo[name][2], future.result())
+    return {name: done[name] for name in charts if name in done}
+
+
+def write_index(rendered, output='charts'):
+    """index.html linking every rendered image, in chart order."""
+    lines = ['<!DOCTYPE html>', '<meta charset="utf-8">', '<title>No-show charts</title>']
+    for name, (path, _) in rendered.items():
+        lines.append(f'<h2>{html.escape(CHARTS[name]["title"])}</h2>')
+        lines.append(f'<img src="{html.escape(os.path.basename(path))}" alt="{name}">')
+    path = os.path.join(output, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=None)
+    parser.add_argument('-o', '--output', default='charts', help='directory of the images')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    tables = chart_tables(args.source, args.chunksize)
+    aggregated = time.perf_counter()
+    rendered = render_charts(tables, args.output, args.jobs)
+    index = write_index(rendered, args.output)
+    for name, (path, seconds) in rendered.items():
+        print(f'{name:<15}{"cached" if not seconds else f"{seconds:.2f} s":>10}  {path}')
+    print(f'Aggregated in {aggregated - start:.2f} s, charts in '
+          f'{time.perf_counter() - aggregated:.2f} s -> {index}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Cleaning pipeline for the no-show dataset
+
+Everything the notebook does to the frame between loading it and
+answering the questions. CLEAN_VERSION is part of the cache key, so it
+has to be bumped whenever the cleaned frame changes, from the loader
+schema to the steps below.
+"""
+
+import numpy as np
+import pandas as pd
+
+from noshow.agebins import AGE_STAGES, bin_ages
+from noshow.loader import FEED_TZ, day_numbers
+from noshow.validate import drop_invalid
+
+CLEAN_VERSION = '7'
+
+#Stages of whole ages, binned by lookup table (see noshow.agebins)
+AGE_BIN_EDGES = AGE_STAGES.edges
+AGE_BIN_NAMES = AGE_STAGES.labels
+
+
+#Days from scheduling to appointment; 0 is a same-day appointment.
+#Appointments before their scheduling fail validation (see noshow.validate)
+LEAD_BIN_EDGES = [-1, 0, 2, 7, 15, 30, 60, 90, np.inf]
+LEAD_BIN_NAMES = ['Same day',
+                  '1-2 days',
+                  '3-7 days',
+                  '8-15 days',
+                  '16-30 days',
+                  '31-60 days',
+                  '61-90 days',
+                  'Over 90 days']
+
+
+#appointmentday has no time, the appointments are taken as the end of the day
+END_OF_DAY = pd.Timedelta(hours=23, minutes=59)
+
+
+def add_age_stages(df, scheme=AGE_STAGES.name):
+    df['age_stages'] = bin_ages(df['age'], scheme).rename('age_stages')
+    return df
+
+
+def end_of_day(times, tz=None, offset=END_OF_DAY):
+    """Move every timestamp to offset past the midnight of its day.
+
+    The day is the one on the wall clock of tz (by default the zone of the
+    series itself), so a feed with offsets gets 23:59 local time. The
+    result is in the zone of the input. Works on the datetime64 values,
+    no Timestamp is built per row.
+    """
+    zone = times.dt.tz
+    if zone is not None and tz is not None:
+        times = times.dt.tz_convert(tz)
+    local_zone = times.dt.tz
+    wall = times.dt.tz_localize(None) if local_zone is not None else times
+    days = wall.to_numpy().astype('datetime64[D]')
+    out = pd.Series(days + offset.to_timedelta64(), index=times.index, name=times.name)
+    out = out.astype(wall.dtype)
+    if local_zone is not None:
+        out = out.dt.tz_localize(local_zone, nonexistent='shift_forward').dt.tz_convert(zone)
+    return out
+
+
+def lead_days(scheduled, appointment, tz=None):
+    """Whole calendar days from scheduled to appointment, as int16.
+
+    Subtracts the day numbers of both columns, so the time of day of the
+    scheduling does not matter and no Timedelta is built per row.
+    """
+    days = day_numbers(appointment, tz) - day_numbers(scheduled, tz)
+    return pd.Series(days.astype(np.int16), index=scheduled.index, name='lead_days')
+
+
+def add_lead_stages(df, edges=LEAD_BIN_EDGES, names=LEAD_BIN_NAMES, tz=FEED_TZ):
+    df['lead_days'] = lead_days(df['scheduledday'], df['appointmentday'], tz)
+    df['lead_stages'] = pd.cut(df['lead_days'], edges, labels=names)
+    return df
+
+
+def add_months(df, tz=FEED_TZ):
+    """Month of the appointment and of the scheduling, on the wall clock of tz."""
+    for name, col in (('apmonth', 'appointmentday'), ('scmonth', 'scheduledday')):
+        times = df[col]
+        if tz is not None and times.dt.tz is not None:
+            times = times.dt.tz_convert(tz)
+        df[name] = times.dt.month.astype('int8')
+    return df
+
+
+def clean(df, tz=FEED_TZ):
+    """Turn a loaded frame (see noshow.loader) into the analysis frame.
+
+    Calendar days are those of the wall clock of tz. Works row by row, so
+    it gives the same rows on chunks as on the whole.
+    """
+    df = drop_invalid(df, tz=tz).reset_index(drop=True)
+    df['appointmentday'] = end_of_day(df['appointmentday'], tz)
+    df = add_age_stages(df)
+    df = add_lead_stages(df, tz=tz)
+    return add_months(df, tz)
@@ -0,0 +1,110 @@
+"""
+Single-pass rate cube
+
+Every column used by a dimension is turned into dense integer codes once;
+each dimension (or cross-product of dimensions) is then a single
+np.bincount over 2 * (code + 1) + no_show, which holds the appointments
+and the no-shows of every code at once. No boolean filter or groupby is run per question, and every
+notebook question becomes a lookup in RateCube.tables.
+"""
+
+import numpy as np
+import pandas as pd
+
+from noshow.rates import (DIMENSIONS, count_codes, merge_tables, missed_flags, plain_index,
+                          with_rates)
+
+
+def column_codes(series):
+    """Codes 0..n-1 of a column (-1 for missing) and the n values they stand for."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.intp)
+        return codes, pd.CategoricalIndex(series.cat.categories, dtype=series.dtype)
+    if pd.api.types.is_integer_dtype(series.dtype) and len(series):
+        #Cast first: the offsets of a narrow dtype (int8) overflow in it
+        values = series.to_numpy().astype(np.intp)
+        low, high = int(values.min()), int(values.max())
+        if high - low < 1 << 16:
+            levels = np.arange(low, high + 1).astype(series.dtype)
+            return values - low, pd.Index(levels)
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def _combine(parts, shape):
+    """Row-major code of several code columns, -1 where any part is missing."""
+    if len(parts) == 1:
+        return parts[0]
+    combined = np.zeros(len(parts[0]), dtype=np.intp)
+    missing = np.zeros(len(parts[0]), dtype=bool)
+    for part, size in zip(parts, shape):
+        combined *= size
+        combined += part
+        missing |= part < 0
+    combined[missing] = -1
+    return combined
+
+
+class RateCube:
+    """Rate tables of several dimensions and their cross-products.
+
+    The tables keep categorical index levels, so that merging keeps the
+    category order (age_stages); cube[name] gives them with plain values.
+    """
+
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+
+    def __getitem__(self, name):
+        return plain_index(self.tables[name])
+
+    def __iter__(self):
+        return iter(self.tables)
+
+    def rates(self, name):
+        return with_rates(self[name])
+
+    def merge(self, other):
+        """Add the tables of a cube built on other rows."""
+        for name, table in other.tables.items():
+            if name in self.tables:
+                table = merge_tables(self.tables[name], table)
+            self.tables[name] = table
+        return self
+
+
+def cross_name(names):
+    return ' x '.join(names)
+
+
+def build_cube(df, dimensions=DIMENSIONS, crosses=()):
+    """Count appointments and no-shows for every dimension in one pass.
+
+    crosses is a list of tuples of dimension names, e.g.
+    [('gender', 'sms_received')], stored under 'gender x sms_received'.
+    """
+    wanted = dict(dimensions)
+    for names in crosses:
+        wanted[cross_name(names)] = [col for name in names for col in dimensions[name]]
+
+    missed = missed_flags(df)
+    codes = {}
+    for columns in wanted.values():
+        for col in columns:
+            if col not in codes:
+                codes[col] = column_codes(df[col])
+
+    tables = {}
+    for name, columns in wanted.items():
+        shape = tuple(len(codes[col][1]) for col in columns)
+        combined = _combine([codes[col][0] for col in columns], shape)
+        count, no_show = count_codes(combined, int(np.prod(shape)), missed)
+
+        if len(columns) == 1:
+            index = codes[columns[0]][1].rename(columns[0])
+        else:
+            index = pd.MultiIndex.from_product([codes[col][1] for col in columns], names=columns)
+        observed = count > 0
+        tables[name] = pd.DataFrame({'count': count[observed], 'no_show': no_show[observed]},
+                                    index=index[observed])
+    return RateCube(tables)
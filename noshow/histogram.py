@@ -0,0 +1,103 @@
+"""
+Pre-binned histograms of the numeric columns
+
+Every integer column is counted per value, with its no-shows, by one
+bincount (see noshow.rates.level_table), so the show/no-show split comes
+with the same pass. Per-value counts of chunks add up exactly, and they
+are grouped into plotting bins only when drawn: np.histogram over the
+values weighted by their counts gives the bars of df.hist on the raw
+rows, while matplotlib only ever sees the bin counts.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from noshow.clean import clean
+from noshow.loader import iter_noshow
+from noshow.rates import level_table, merge_tables
+
+BINS = 10
+
+
+def histogram_columns(df):
+    """The integer columns of a frame, the ones df.hist would draw."""
+    return [col for col in df.columns if pd.api.types.is_integer_dtype(df[col])]
+
+
+def histograms(df, columns=None):
+    """Count and no-shows per value of every column (all integer columns by default)."""
+    columns = histogram_columns(df) if columns is None else columns
+    return {col: level_table(df, col) for col in columns}
+
+
+def merge_histograms(*parts):
+    """Add up the histograms of disjoint chunks, column by column."""
+    merged = {}
+    for part in parts:
+        for col, table in part.items():
+            merged[col] = merge_tables(merged[col], table) if col in merged else table
+    return merged
+
+
+def stream_histograms(source=None, chunksize=100_000, columns=None):
+    """histograms() of a whole file, read chunksize rows at a time."""
+    merged = {}
+    for chunk in iter_noshow(source, chunksize=chunksize):
+        merged = merge_histograms(merged, histograms(clean(chunk), columns))
+    return merged
+
+
+def binned(table, bins=BINS):
+    """Counts of show-ups and no-shows in bins equal-width bins of the values.
+
+    Returns the bin edges and a frame with the count, show_up and no_show
+    of every bin. Bins span the lowest to the highest value seen, as the
+    histogram of the raw rows would.
+    """
+    table = table[table['count'] > 0]
+    values = table.index.to_numpy()
+    span = (values.min(), values.max()) if len(values) else (0, 1)
+    edges = np.histogram_bin_edges(values, bins, range=span)
+    count = np.histogram(values, edges, weights=table['count'].to_numpy())[0]
+    no_show = np.histogram(values, edges, weights=table['no_show'].to_numpy())[0]
+    counts = pd.DataFrame({'count': count, 'show_up': count - no_show, 'no_show': no_show},
+                          dtype='int64')
+    return edges, counts
+
+
+def plot_histogram(table, ax=None, bins=BINS, column='count', **kwargs):
+    """Draw the bars of one column from its counts."""
+    import matplotlib.pyplot as plt
+    ax = ax or plt.gca()
+    edges, counts = binned(table, bins)
+    ax.hist(edges[:-1], edges, weights=counts[column], **kwargs)
+    return ax
+
+
+def plot_split(table, ax=None, bins=BINS):
+    """Show-ups and no-shows of one column, overlaid (the notebook's age histograms)."""
+    import matplotlib.pyplot as plt
+    ax = ax or plt.gca()
+    plot_histogram(table, ax, bins, 'show_up', alpha=0.5, label='show up')
+    plot_histogram(table, ax, bins, 'no_show', alpha=0.5, label='no show')
+    ax.legend()
+    return ax
+
+
+def plot_histograms(hists, bins=BINS, figsize=None):
+    """A grid with the histogram of every column, like df.hist."""
+    import matplotlib.pyplot as plt
+    columns = list(hists)
+    ncols = math.ceil(math.sqrt(len(columns)))
+    nrows = math.ceil(len(columns) / ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=figsize, squeeze=False)
+    for ax, col in zip(axes.flat, columns):
+        plot_histogram(hists[col], ax, bins)
+        ax.set_title(col)
+        ax.grid(True)
+    for ax in axes.flat[len(columns):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    return axes
@@ -0,0 +1,171 @@
+"""
+Per-patient history features from PatientId
+
+For every appointment, as known when it was booked: how many earlier
+appointments of the same patient had already taken place (appointment
+day before this scheduling), how many of those were missed and how many
+days passed since the last of them. Appointments still to come at
+booking time have no known outcome and are not counted, so the features
+do not leak the target. Bookings and outcomes are sorted once as events
+on (patientid, time) and the features come from cumulative scans over
+the sorted arrays, no loop over patients.
+
+Files too big for memory are split by a hash of PatientId into
+partitions spilled to disk, so every patient's history lands in a single
+partition, and the partitions are scanned one at a time.
+
+Usage: python -m noshow.history [noshow.csv | archive] -o history.csv [--partitions N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from noshow.clean import clean
+from noshow.loader import iter_noshow, load_noshow
+
+FEATURES = ['prior_count', 'prior_no_show', 'days_since_last']
+
+DAY_NS = 86_400 * 10**9
+
+
+def _run_starts(is_start):
+    """Index of the first row of the run every row belongs to."""
+    index = np.where(is_start, np.arange(len(is_start)), 0)
+    return np.maximum.accumulate(index)
+
+
+def history_features(patients, scheduled, appointment, missed):
+    """The history features of appointments given as parallel arrays.
+
+    scheduled and appointment are datetime64 values; missed is the 0/1
+    no-show flag. Returns a frame of FEATURES in the order of the input;
+    days_since_last (from the last appointment already taken place to
+    this booking) is NaN when there is none.
+    """
+    rows = len(patients)
+    scheduled = np.asarray(scheduled).astype('datetime64[ns]').astype(np.int64)
+    appointment = np.asarray(appointment).astype('datetime64[ns]').astype(np.int64)
+    #One booking event (kind 0) and one outcome event (kind 1) per row. An
+    #outcome at the very instant of a booking sorts after it: not yet known
+    kind = np.repeat(np.array([0, 1], dtype=np.int8), rows)
+    who = np.concatenate((patients, patients))
+    when = np.concatenate((scheduled, appointment))
+    order = np.lexsort((kind, when, who))
+    who, when = who[order], when[order]
+    is_outcome = kind[order] == 1
+    outcome_missed = np.concatenate((np.zeros(rows, dtype=np.int64),
+                                     np.asarray(missed, dtype=np.int64)))[order]
+
+    new_patient = np.ones(len(order), dtype=bool)
+    new_patient[1:] = who[1:] != who[:-1]
+    patient_start = _run_starts(new_patient)
+
+    #Outcomes and missed outcomes before every event: exclusive cumulative sums
+    known = np.concatenate(([0], np.cumsum(is_outcome)))
+    known_missed = np.concatenate(([0], np.cumsum(outcome_missed)))
+    events = np.arange(len(order))
+    prior_count = known[events] - known[patient_start]
+    prior_no_show = known_missed[events] - known_missed[patient_start]
+    #Last outcome at or before every event; inside the patient when prior_count > 0
+    last = _run_starts(is_outcome)
+    has_prior = prior_count > 0
+    days = np.where(has_prior, (when - when[last]) / DAY_NS, np.nan)
+
+    booking = ~is_outcome
+    out = np.empty(rows, dtype=[('prior_count', np.int32), ('prior_no_show', np.int32),
+                                ('days_since_last', np.float64)])
+    target = order[booking]
+    out['prior_count'][target] = prior_count[booking]
+    out['prior_no_show'][target] = prior_no_show[booking]
+    out['days_since_last'][target] = days[booking]
+    return pd.DataFrame(out)
+
+
+def add_history(df):
+    """Add FEATURES to a cleaned frame loaded with_ids=True."""
+    times = [df[col].dt.tz_convert(None) if df[col].dt.tz is not None else df[col]
+             for col in ('scheduledday', 'appointmentday')]
+    features = history_features(df['patientid'].to_numpy(), times[0].to_numpy(),
+                                times[1].to_numpy(), df['no_show'].to_numpy())
+    features.index = df.index
+    for col in FEATURES:
+        df[col] = features[col]
+    return df
+
+
+def load_history(source=None):
+    """The whole cleaned dataset with identifiers and history features."""
+    return add_history(clean(load_noshow(source, with_ids=True)))
+
+
+def partition_of(patients, partitions):
+    """Partition number of every PatientId, stable across chunks and runs."""
+    hashes = pd.util.hash_array(np.asarray(patients, dtype=np.float64))
+    return (hashes % np.uint64(partitions)).astype(np.intp)
+
+
+def iter_history(source=None, partitions=16, chunksize=100_000, workdir=None):
+    """Yield the history features of a file, one patient partition at a time.
+
+    The file is read in chunks and every chunk is split by partition_of
+    into pickles under workdir (a temporary directory by default, removed
+    at the end), so memory holds one chunk while splitting and one
+    partition while scanning. Each frame yielded has appointmentid,
+    patientid and FEATURES.
+    """
+    spill = tempfile.mkdtemp(prefix='noshow-history-', dir=workdir)
+    try:
+        columns = ['appointmentid', 'patientid', 'scheduledday', 'appointmentday', 'no_show']
+        for i, chunk in enumerate(iter_noshow(source, chunksize=chunksize, with_ids=True)):
+            chunk = clean(chunk)[columns]
+            parts = partition_of(chunk['patientid'].to_numpy(), partitions)
+            for part, rows in chunk.groupby(parts, sort=False):
+                rows.to_pickle(os.path.join(spill, f'{part:04d}-{i:06d}.pkl'))
+        names = sorted(os.listdir(spill))
+        for part in range(partitions):
+            prefix = f'{part:04d}-'
+            files = [os.path.join(spill, name) for name in names if name.startswith(prefix)]
+            if not files:
+                continue
+            df = pd.concat([pd.read_pickle(path) for path in files], ignore_index=True)
+            for path in files:
+                os.remove(path)
+            df = add_history(df)
+            yield df[['appointmentid', 'patientid'] + FEATURES]
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+
+
+def write_history(source, output, partitions=16, chunksize=100_000, workdir=None):
+    """Write the history features of a file to a CSV, partition after partition."""
+    rows = 0
+    tmp = output + '.tmp'
+    with open(tmp, 'w', newline='') as f:
+        for i, part in enumerate(iter_history(source, partitions, chunksize, workdir)):
+            part.to_csv(f, header=i == 0, index=False)
+            rows += len(part)
+    os.replace(tmp, output)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=None)
+    parser.add_argument('-o', '--output', default='noshow_history.csv')
+    parser.add_argument('--partitions', type=int, default=16,
+                        help='patient partitions spilled to disk (more for bigger files)')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--workdir', default=None, help='where the partitions are spilled')
+    args = parser.parse_args(argv)
+
+    rows = write_history(args.source, args.output, args.partitions, args.chunksize, args.workdir)
+    print(f'{rows} appointments -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
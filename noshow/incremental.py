@@ -0,0 +1,159 @@
+"""
+Incremental no-show aggregates updated from daily delta files
+
+The counts and no-shows of every breakdown, of every scheduling month
+and of every comorbidity cell are kept in a small JSON state file. A new
+delta CSV is read in chunks, cleaned and counted, and its counts are
+added to the state, so a refresh costs time in the size of the delta
+only. Counts add up exactly, so the percentages are identical to a full
+recompute over all the files. Deltas already applied (same content
+hash) are skipped.
+
+Usage: python -m noshow.incremental STATE.json DELTA [DELTA ...] [-o report.json]
+"""
+
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from noshow.archive import split_source
+from noshow.batch import write_results
+from noshow.cache import file_digest
+from noshow.clean import CLEAN_VERSION, clean
+from noshow.cube import RateCube, build_cube
+from noshow.loader import iter_noshow
+from noshow.rates import DIMENSIONS
+from noshow.timeseries import fill_span, period_table
+
+STATE_VERSION = 1
+
+
+def _level_to_json(level):
+    if isinstance(level, pd.PeriodIndex):
+        return {'name': level.name, 'values': level.astype(str).tolist(), 'period': level.freqstr}
+    if isinstance(level, pd.CategoricalIndex):
+        return {'name': level.name, 'values': level.astype(object).tolist(),
+                'categories': level.categories.tolist(), 'ordered': bool(level.ordered)}
+    return {'name': level.name, 'values': level.tolist(), 'dtype': str(level.dtype)}
+
+
+def _level_from_json(spec):
+    if 'period' in spec:
+        return pd.PeriodIndex(spec['values'], freq=spec['period'], name=spec['name'])
+    if 'categories' in spec:
+        dtype = pd.CategoricalDtype(spec['categories'], ordered=spec['ordered'])
+        return pd.CategoricalIndex(spec['values'], dtype=dtype, name=spec['name'])
+    return pd.Index(spec['values'], dtype=spec['dtype'], name=spec['name'])
+
+
+def table_to_json(table):
+    index = table.index
+    levels = [index.get_level_values(i) for i in range(index.nlevels)]
+    return {'index': [_level_to_json(level) for level in levels],
+            'count': table['count'].tolist(),
+            'no_show': table['no_show'].tolist()}
+
+
+def table_from_json(doc):
+    levels = [_level_from_json(spec) for spec in doc['index']]
+    index = levels[0] if len(levels) == 1 else pd.MultiIndex.from_arrays(levels)
+    return pd.DataFrame({'count': doc['count'], 'no_show': doc['no_show']},
+                        index=index, dtype='int64')
+
+
+def delta_digest(source):
+    """Content hash of a delta; of the archive and the member name for 'archive.zip::member.csv'."""
+    path, member = split_source(source)
+    digest = file_digest(path)
+    return f'{digest}::{member}' if member else digest
+
+
+class AggregateState:
+    """Counts of every breakdown over all the deltas applied so far."""
+
+    def __init__(self):
+        self.cube = RateCube()
+        self.rows = 0
+        self.no_show = 0
+        self.applied = {}
+
+    def add_chunk(self, df):
+        """Add a cleaned chunk."""
+        chunk = build_cube(df, DIMENSIONS)
+        chunk.tables['month'] = period_table(df, 'scheduledday', 'M')
+        self.cube.merge(chunk)
+        self.rows += len(df)
+        self.no_show += int(df['no_show'].sum())
+
+    def apply(self, source, chunksize=100_000, force=False):
+        """Add the appointments of a delta file; False if it was already applied."""
+        digest = delta_digest(source)
+        if digest in self.applied and not force:
+            return False
+        for chunk in iter_noshow(source, chunksize=chunksize):
+            self.add_chunk(clean(chunk))
+        if 'month' in self.cube.tables:
+            self.cube.tables['month'] = fill_span(self.cube.tables['month'])
+        self.applied[digest] = os.path.basename(source)
+        return True
+
+    def result(self, source='incremental'):
+        """The state as a noshow.batch result, for write_results()."""
+        return {'source': source, 'rows': self.rows, 'no_show': self.no_show, 'cube': self.cube}
+
+    def save(self, path):
+        doc = {'state_version': STATE_VERSION,
+               'clean_version': CLEAN_VERSION,
+               'rows': self.rows,
+               'no_show': self.no_show,
+               'applied': self.applied,
+               'tables': {name: table_to_json(table) for name, table in self.cube.tables.items()}}
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """The state saved at path, or an empty one if there is none yet."""
+        state = cls()
+        if not os.path.exists(path):
+            return state
+        with open(path) as f:
+            doc = json.load(f)
+        if doc['state_version'] != STATE_VERSION or doc['clean_version'] != CLEAN_VERSION:
+            raise ValueError(f'{path} was built by another version of the pipeline '
+                             f'(clean version {doc["clean_version"]}, now {CLEAN_VERSION}); '
+                             'rebuild it from the full history')
+        state.rows = doc['rows']
+        state.no_show = doc['no_show']
+        state.applied = doc['applied']
+        state.cube = RateCube({name: table_from_json(table) for name, table in doc['tables'].items()})
+        return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('state', help='JSON state file, created if missing')
+    parser.add_argument('deltas', nargs='+', help='new CSV files or archives')
+    parser.add_argument('-o', '--output', help='write the updated rate tables here (.json or .parquet)')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--force', action='store_true', help='apply deltas seen before again')
+    args = parser.parse_args(argv)
+
+    state = AggregateState.load(args.state)
+    for delta in args.deltas:
+        if state.apply(delta, args.chunksize, args.force):
+            print(f'{delta}: applied')
+        else:
+            print(f'{delta}: already applied, skipped')
+    state.save(args.state)
+    print(f'{state.rows} appointments, {state.no_show} no-shows in {args.state}')
+    if args.output:
+        write_results([state.result()], args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Typed loader for the no-show appointments dataset
+
+The columns are read straight into their final dtypes: the flags as int8,
+Gender/Neighbourhood as category, the two dates parsed by the reader and
+the identifiers skipped unless asked for.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from noshow.archive import open_source
+
+ID_COLUMNS = ['PatientId', 'AppointmentID']
+DATE_COLUMNS = ['ScheduledDay', 'AppointmentDay']
+FLAG_COLUMNS = ['Scholarship', 'Hipertension', 'Diabetes', 'Alcoholism', 'SMS_received']
+
+#Column order of noshow.csv, without the identifiers
+COLUMNS = ['Gender', 'ScheduledDay', 'AppointmentDay', 'Age', 'Neighbourhood',
+           'Scholarship', 'Hipertension', 'Diabetes', 'Alcoholism', 'Handcap',
+           'SMS_received', 'No-show']
+
+#'No' is code 0 and 'Yes' is code 1, so the codes are already the no_show flag
+NO_SHOW_DTYPE = pd.CategoricalDtype(['No', 'Yes'])
+DATE_DTYPE = 'datetime64[ns, UTC]'
+
+#The dates are read into UTC, whatever offset they carry; calendar days
+#(end of day, lead days, months, validation) are taken on the wall clock of
+#FEED_TZ. noshow.csv is written in UTC; set this to the zone of a feed
+#with offsets, e.g. 'America/Sao_Paulo', and bump clean.CLEAN_VERSION
+FEED_TZ = 'UTC'
+
+DTYPES = {
+    'PatientId': 'float64',
+    'AppointmentID': 'int64',
+    'Gender': 'category',
+    'Age': 'int16',
+    'Neighbourhood': 'category',
+    'Handcap': 'int8',
+    'No-show': NO_SHOW_DTYPE,
+}
+DTYPES.update({col: 'int8' for col in FLAG_COLUMNS})
+
+#Where the data is looked for when no source is given: a loose CSV, else
+#the archives it ships in (relative to the working directory)
+DEFAULT_SOURCES = ['noshow.csv',
+                   os.path.join('send for evaluation 2 (final)', 'nowshow_v2.zip'),
+                   os.path.join('send for evaluation', 'noshow.zip'),
+                   os.path.join('send for evaluation', 'no-show.rar')]
+
+RENAME = {col: col.lower() for col in ID_COLUMNS + COLUMNS}
+RENAME['No-show'] = 'no_show'
+
+
+def default_source():
+    """The first of DEFAULT_SOURCES that exists, noshow.csv if none does."""
+    for source in DEFAULT_SOURCES:
+        if os.path.exists(source):
+            return source
+    return DEFAULT_SOURCES[0]
+
+
+def day_numbers(times, tz=FEED_TZ):
+    """Calendar day of every timestamp as days since 1970, on the wall clock of tz."""
+    if times.dt.tz is not None:
+        if tz is not None:
+            times = times.dt.tz_convert(tz)
+        times = times.dt.tz_localize(None)
+    return times.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _parse_dates(df):
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], format='ISO8601', utc=True).astype(DATE_DTYPE)
+    return df
+
+
+def read_noshow(source, with_ids=False, chunksize=None, engine='c', **kwargs):
+    """Read noshow.csv with the typed schema, keeping the original names.
+
+    source may also be a zip or rar archive, like the ones in "send for
+    evaluation", read without extracting it (see noshow.archive). With
+    chunksize set an iterator of frames is returned instead.
+    engine='pyarrow' is also accepted for whole files; whether it is faster
+    depends on the pandas and pyarrow versions (benchmarks/bench_loader.py
+    compares them), and it holds the raw text and the Arrow table at once,
+    so its peak memory is higher.
+    """
+    usecols = ID_COLUMNS + COLUMNS if with_ids else COLUMNS
+    options = dict(usecols=usecols,
+                   dtype={col: DTYPES[col] for col in usecols if col in DTYPES},
+                   engine=engine)
+    options.update(kwargs)
+    if chunksize is not None:
+        return _read_chunks(source, chunksize, options)
+    with open_source(source) as f:
+        if engine == 'pyarrow':
+            df = pd.read_csv(f, parse_dates=DATE_COLUMNS, **options)
+            return df.astype({col: DATE_DTYPE for col in DATE_COLUMNS})
+        #The C parser's own parse_dates goes through Python objects, so the
+        #dates are converted column-wise right after the read
+        return _parse_dates(pd.read_csv(f, **options))
+
+
+def _read_chunks(source, chunksize, options):
+    with open_source(source) as f:
+        with pd.read_csv(f, chunksize=chunksize, **options) as reader:
+            for chunk in reader:
+                yield _parse_dates(chunk)
+
+
+def tidy(df):
+    """Rename to the analysis names and turn No-show into a 0/1 int8 flag."""
+    df = df.rename(columns=RENAME)
+    df['no_show'] = df['no_show'].cat.codes.astype('int8')
+    #The parser merges the categories of its internal blocks unsorted
+    for col in ['gender', 'neighbourhood']:
+        df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+    return df
+
+
+def load_noshow(source=None, with_ids=False, **kwargs):
+    """Load the whole dataset ready for analysis."""
+    return tidy(read_noshow(source or default_source(), with_ids=with_ids, **kwargs))
+
+
+def iter_noshow(source=None, chunksize=100_000, with_ids=False, **kwargs):
+    """Yield the dataset in tidy chunks of at most chunksize rows."""
+    for chunk in read_noshow(source or default_source(), with_ids=with_ids,
+                             chunksize=chunksize, **kwargs):
+        yield tidy(chunk)
@@ -0,0 +1,251 @@
+"""
+Logistic-regression no-show model trained on streamed chunks
+
+Every appointment is one-hot encoded field by field: gender,
+neighbourhood, age_stages, lead_stages, handcap and the 0/1 flags.
+Each field sets exactly one weight (a slot kept for unseen or missing
+values included), so the sparse design matrix is stored as a dense
+matrix of weight indices with one column per field, and a row's score
+is the sum of the weights it points to. Training is mini-batch SGD with
+per-weight (AdaGrad) step sizes over chunks read one after another, so
+the data never has to fit in memory. A fixed share of appointments,
+picked by a hash of AppointmentID, is held out to measure the AUC.
+
+Usage: python -m noshow.model [noshow.csv | archive] [-o noshow_model.npz] [--epochs N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from noshow.clean import AGE_BIN_EDGES, AGE_BIN_NAMES, LEAD_BIN_EDGES, LEAD_BIN_NAMES, clean
+from noshow.loader import FEED_TZ, iter_noshow
+
+MODEL_VERSION = 3
+
+#Field -> column of the cleaned frame. The levels of the ones not listed
+#in FIXED_LEVELS are read from the data
+FIELDS = ['gender', 'neighbourhood', 'age_stages', 'lead_stages', 'handcap',
+          'scholarship', 'hipertension', 'diabetes', 'alcoholism', 'sms_received']
+FIXED_LEVELS = {
+    'age_stages': AGE_BIN_NAMES,
+    'lead_stages': LEAD_BIN_NAMES,
+    'handcap': [0, 1, 2, 3, 4],
+    'scholarship': [0, 1],
+    'hipertension': [0, 1],
+    'diabetes': [0, 1],
+    'alcoholism': [0, 1],
+    'sms_received': [0, 1],
+}
+
+
+class Encoder:
+    """Maps the fields of a cleaned frame to weight indices.
+
+    Field f owns the weights offsets[f] to offsets[f + 1] - 1; the first
+    of them is for values outside its levels.
+    """
+
+    def __init__(self, levels):
+        self.levels = {field: pd.Index(levels[field]) for field in FIELDS}
+        sizes = [len(self.levels[field]) + 1 for field in FIELDS]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))
+
+    @property
+    def size(self):
+        return int(self.offsets[-1])
+
+    @classmethod
+    def fit(cls, source=None, chunksize=100_000):
+        """Read the levels of the data-dependent fields from a file."""
+        seen = {field: set() for field in FIELDS if field not in FIXED_LEVELS}
+        for chunk in iter_noshow(source, chunksize=chunksize):
+            for field, values in seen.items():
+                column = chunk[field]
+                values.update(column.cat.categories if hasattr(column, 'cat') else column.unique())
+        levels = dict(FIXED_LEVELS)
+        levels.update({field: sorted(values) for field, values in seen.items()})
+        return cls(levels)
+
+    def field_codes(self, field, series):
+        """1 + position of every value in the levels of field, 0 if absent."""
+        levels = self.levels[field]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            #Look up the categories once, -1 (missing) picks the trailing 0
+            lut = np.append(levels.get_indexer(series.cat.categories) + 1, 0)
+            return lut[series.cat.codes.to_numpy()]
+        return levels.get_indexer(series.to_numpy()) + 1
+
+    def encode(self, df):
+        """int32 matrix of weight indices, one row per appointment and one column per field."""
+        index = np.empty((len(df), len(FIELDS)), dtype=np.int32)
+        for i, field in enumerate(FIELDS):
+            index[:, i] = self.field_codes(field, df[field]) + self.offsets[i]
+        return index
+
+
+def sigmoid(z):
+    return 1 / (1 + np.exp(-z))
+
+
+class LogisticModel:
+    """Weights of the one-hot features plus a bias."""
+
+    def __init__(self, encoder, weights=None, bias=0.0):
+        self.encoder = encoder
+        self.weights = np.zeros(encoder.size) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+
+    def scores(self, index):
+        return sigmoid(self.weights[index].sum(axis=1) + self.bias)
+
+    def predict_proba(self, df):
+        """No-show probability of every appointment of a cleaned frame."""
+        return self.scores(self.encoder.encode(df))
+
+    def save(self, path):
+        """Write the weights and the levels of every field to a .npz file."""
+        #Plain str/int arrays, so the file loads without pickle
+        arrays = {f'levels_{field}': np.asarray(self.encoder.levels[field].tolist())
+                  for field in FIELDS}
+        #The bin edges and the zone of the calendar days let noshow.scoring
+        #bin raw ages and dates by itself, the same way as the training
+        np.savez_compressed(path, version=MODEL_VERSION, fields=np.array(FIELDS), tz=FEED_TZ,
+                            weights=self.weights.astype(np.float32), bias=self.bias,
+                            age_edges=np.asarray(AGE_BIN_EDGES, dtype=np.float64),
+                            lead_edges=np.asarray(LEAD_BIN_EDGES, dtype=np.float64), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            if int(f['version']) != MODEL_VERSION or list(f['fields']) != FIELDS:
+                raise ValueError(f'{path} was saved by another version of the model')
+            encoder = Encoder({field: f[f'levels_{field}'].tolist() for field in FIELDS})
+            return cls(encoder, f['weights'], f['bias'])
+
+
+class SGDTrainer:
+    """Mini-batch SGD on the log loss, with AdaGrad step sizes and L2."""
+
+    def __init__(self, model, lr=0.1, l2=1e-6, batch_size=1024, seed=0):
+        self.model = model
+        self.lr = lr
+        self.l2 = l2
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.squared = np.full(model.encoder.size + 1, 1e-8)
+
+    def step(self, index, y):
+        model = self.model
+        residual = model.scores(index) - y
+        #Gradient of the mean loss: every row adds its residual to the weights it uses
+        grad = np.bincount(index.ravel(), weights=np.repeat(residual, index.shape[1]),
+                           minlength=model.encoder.size) / len(y)
+        grad += self.l2 * model.weights
+        grad = np.append(grad, residual.mean())
+        self.squared += grad * grad
+        update = self.lr * grad / np.sqrt(self.squared)
+        model.weights -= update[:-1]
+        model.bias -= update[-1]
+
+    def partial_fit(self, index, y):
+        """One pass of shuffled mini-batches over a chunk."""
+        order = self.rng.permutation(len(y))
+        for start in range(0, len(y), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            self.step(index[rows], y[rows])
+
+
+def holdout_mask(ids, share):
+    """Appointments kept out of training, the same in every epoch and run."""
+    hashes = pd.util.hash_array(np.asarray(ids, dtype=np.int64))
+    return hashes % np.uint64(10_000) < np.uint64(round(share * 10_000))
+
+
+def auc(y, scores):
+    """Area under the ROC curve (Mann-Whitney, ties count half)."""
+    y = np.asarray(y, dtype=bool)
+    positives = y.sum()
+    negatives = len(y) - positives
+    if not positives or not negatives:
+        return np.nan
+    ranks = pd.Series(scores).rank().to_numpy()
+    return (ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives)
+
+
+def train(source=None, epochs=3, chunksize=100_000, holdout=0.1, lr=0.1, l2=1e-6,
+          batch_size=1024, seed=0, encoder=None):
+    """Fit a LogisticModel on a file read chunk by chunk.
+
+    Returns the model and a dict of report numbers: training rows,
+    rows/sec of the SGD alone and of the whole run (reading included),
+    and the AUC and log loss on the held-out appointments.
+    """
+    started = time.perf_counter()
+    encoder = encoder or Encoder.fit(source, chunksize)
+    model = LogisticModel(encoder)
+    trainer = SGDTrainer(model, lr, l2, batch_size, seed)
+
+    sgd_seconds = 0.0
+    seen = 0
+    for epoch in range(epochs):
+        last = epoch == epochs - 1
+        held_y, held_scores = [], []
+        trained = 0
+        for chunk in iter_noshow(source, chunksize=chunksize, with_ids=True):
+            chunk = clean(chunk)
+            index = encoder.encode(chunk)
+            y = chunk['no_show'].to_numpy().astype(np.float64)
+            held = holdout_mask(chunk['appointmentid'], holdout)
+            tick = time.perf_counter()
+            trainer.partial_fit(index[~held], y[~held])
+            sgd_seconds += time.perf_counter() - tick
+            trained += int((~held).sum())
+            seen += int((~held).sum())
+            if last:
+                held_y.append(y[held])
+                held_scores.append(model.scores(index[held]))
+
+    y = np.concatenate(held_y)
+    scores = np.concatenate(held_scores)
+    clipped = np.clip(scores, 1e-12, 1 - 1e-12)
+    report = {
+        'epochs': epochs,
+        'train_rows': trained,
+        'holdout_rows': len(y),
+        'sgd_rows_per_sec': seen / sgd_seconds if sgd_seconds else np.nan,
+        'rows_per_sec': seen / (time.perf_counter() - started),
+        'holdout_auc': auc(y, scores),
+        'holdout_log_loss': float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+    }
+    return model, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=None)
+    parser.add_argument('-o', '--output', default='noshow_model.npz')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--lr', type=float, default=0.1)
+    parser.add_argument('--l2', type=float, default=1e-6)
+    parser.add_argument('--holdout', type=float, default=0.1, help='share of appointments held out')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    model, report = train(args.source, args.epochs, args.chunksize, args.holdout,
+                          args.lr, args.l2, args.batch_size, args.seed)
+    model.save(args.output)
+    print(f'Trained on {report["train_rows"]} rows x {report["epochs"]} epochs, '
+          f'{report["holdout_rows"]} held out')
+    print(f'Throughput: {report["sgd_rows_per_sec"]:,.0f} rows/sec (SGD), '
+          f'{report["rows_per_sec"]:,.0f} rows/sec (end to end)')
+    print(f'Held-out AUC: {report["holdout_auc"]:.4f}, log loss: {report["holdout_log_loss"]:.4f}')
+    print(f'Model -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+One-pass data profile of an incoming no-show file
+
+Before cleaning, every column gets its dtype, null count, distinct
+count, min and max, most frequent values and memory footprint. All of
+them are gathered in the same pass over the chunks (see noshow.sketches
+and noshow.topk), instead of head(), info(), nunique() and describe()
+each walking the columns again. The profile is written as JSON.
+
+Usage: python -m noshow.profile [INPUT ...] [-o noshow_profile.json] [-j JOBS]
+"""
+
+import argparse
+import json
+import os
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from noshow.loader import default_source, iter_noshow
+from noshow.sketches import ColumnSketch, column_kind
+from noshow.topk import SpaceSaving
+
+TOP_VALUES = 5
+
+#Counters kept for the top values of a column; below this many distinct
+#values they are exact
+TOP_CAPACITY = 256
+
+
+def _memory(series):
+    #Only object columns need the deep (per value) measure
+    return int(series.memory_usage(index=False, deep=series.dtype == object))
+
+
+class ColumnProfile:
+    """Running profile of one column."""
+
+    def __init__(self, series):
+        self.dtype = str(series.dtype)
+        self.kind = column_kind(series)
+        self.tz = str(series.dt.tz) if self.kind == 'datetime' and series.dt.tz else None
+        self.sketch = ColumnSketch(self.kind, quantiles=False)
+        #Set by profile_frame(), which has the whole column at hand
+        self.exact_distinct = None
+        self.top = SpaceSaving(TOP_CAPACITY)
+        self.low = self.high = None
+        self.memory = 0
+
+    def update(self, series):
+        self.sketch.update(series)
+        counts = series.value_counts(sort=False)
+        self.top.merge_counts(counts)
+        if self.kind == 'other':
+            #Min and max of the values seen, compared as text
+            seen = counts.index[counts.to_numpy() > 0].astype(str)
+            if len(seen):
+                low, high = seen.min(), seen.max()
+                self.low = low if self.low is None else min(self.low, low)
+                self.high = high if self.high is None else max(self.high, high)
+        self.memory += _memory(series)
+        return self
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.top.merge(other.top)
+        for value in (other.low, other.high):
+            if value is not None:
+                self.low = value if self.low is None else min(self.low, value)
+                self.high = value if self.high is None else max(self.high, value)
+        self.memory += other.memory
+        return self
+
+    def _value(self, value):
+        if self.kind == 'datetime':
+            return str(pd.Timestamp(int(value), tz='UTC').tz_convert(self.tz)) if self.tz \
+                else str(pd.Timestamp(int(value)))
+        if isinstance(value, (np.integer, np.floating)):
+            return value.item()
+        return value
+
+    def result(self):
+        sketch = self.sketch
+        exact = self.exact_distinct
+        moments = sketch.moments
+        if moments is not None and moments.count:
+            low, high = self._value(moments.min), self._value(moments.max)
+            if self.kind == 'number' and float(low).is_integer() and float(high).is_integer():
+                low, high = int(low), int(high)
+        else:
+            low, high = self.low, self.high
+        #Last row is the remainder of the other values
+        top = self.top.top_k(TOP_VALUES).iloc[:-1]
+        return {
+            'dtype': self.dtype,
+            'nulls': sketch.nulls,
+            'distinct': sketch.distinct.count() if exact is None else exact,
+            'distinct_exact': exact is not None or sketch.distinct.registers is None,
+            'min': low,
+            'max': high,
+            'top': [[str(key), int(count)] for key, count in top.items()],
+            'top_exact': self.top.floor == 0 or self.top.guaranteed(TOP_VALUES),
+            'memory_bytes': self.memory,
+        }
+
+
+class Profile:
+    """ColumnProfile of every column of a stream of frames."""
+
+    def __init__(self, source=None):
+        self.source = source
+        self.rows = 0
+        self.columns = {}
+        self.seconds = 0.0
+
+    def update(self, df):
+        start = time.perf_counter()
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(df[col])
+            self.columns[col].update(df[col])
+        self.rows += len(df)
+        self.seconds += time.perf_counter() - start
+        return self
+
+    def merge(self, other):
+        for col, column in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(column)
+            else:
+                self.columns[col] = column
+        self.rows += other.rows
+        self.seconds += other.seconds
+        return self
+
+    def result(self):
+        return {'source': self.source,
+                'rows': self.rows,
+                'memory_bytes': sum(column.memory for column in self.columns.values()),
+                'seconds': round(self.seconds, 4),
+                'columns': {col: column.result() for col, column in self.columns.items()}}
+
+    def table(self):
+        """The profile as a frame, one row per column, for printing."""
+        columns = self.result()['columns']
+        table = pd.DataFrame.from_dict(columns, orient='index')
+        table['top'] = [', '.join(f'{key} ({count})' for key, count in column['top'][:3])
+                        for column in columns.values()]
+        return table.drop(columns=['distinct_exact', 'top_exact'])
+
+
+def profile_frame(df, source=None):
+    """Profile of a frame already in memory, with exact distinct counts.
+
+    The sketches are for the streaming path; here the whole frame is at
+    hand, so the distinct counts come from df.nunique().
+    """
+    profile = Profile(source).update(df)
+    for col, count in df.nunique().items():
+        profile.columns[col].exact_distinct = int(count)
+    return profile
+
+
+def profile_source(source=None, chunksize=100_000, with_ids=True):
+    """Profile of a file as loaded, before cleaning, read chunk by chunk."""
+    source = source or default_source()
+    profile = Profile(source)
+    for chunk in iter_noshow(source, chunksize=chunksize, with_ids=with_ids):
+        profile.update(chunk)
+    return profile
+
+
+def profile_all(sources, jobs=None, chunksize=100_000):
+    """profile_source() of every file, in a process pool, in input order."""
+    work = partial(profile_source, chunksize=chunksize)
+    if jobs == 1 or len(sources) <= 1:
+        return [work(source) for source in sources]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(work, sources))
+
+
+def write_profiles(profiles, output):
+    """Write {source: profile} as JSON, atomically."""
+    doc = {profile.source: profile.result() for profile in profiles}
+    tmp = f'{output}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, output)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='*', help='CSV files or archives (noshow.csv by default)')
+    parser.add_argument('-o', '--output', default='noshow_profile.json')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    profiles = profile_all(args.inputs or [default_source()], args.jobs, args.chunksize)
+    for profile in profiles:
+        print(f'{profile.source}: {profile.rows} rows in {profile.seconds:.2f} s')
+    print(f'profile written to {write_profiles(profiles, args.output)}')
+
+
+if __name__ == '__main__':
+    main()
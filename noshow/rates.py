@@ -0,0 +1,111 @@
+"""
+No-show rate tables
+
+A rate table is a DataFrame indexed by the values of one or more columns
+with two integer columns: count (appointments) and no_show (appointments
+missed). Tables built from disjoint parts of the data are merged by
+adding both columns, which gives exactly the table of the whole.
+"""
+
+import numpy as np
+import pandas as pd
+
+#The breakdowns answered in the notebook
+DIMENSIONS = {
+    'age_stages': ['age_stages'],
+    'lead_stages': ['lead_stages'],
+    'neighbourhood': ['neighbourhood'],
+    'gender': ['gender'],
+    'sms_received': ['sms_received'],
+    'scholarship': ['scholarship'],
+    'handcap': ['handcap'],
+    'scmonth': ['scmonth'],
+    'comorbidity': ['hipertension', 'diabetes', 'alcoholism'],
+}
+
+
+def rate_table(df, columns):
+    """Appointments and no-shows per value of columns."""
+    grouped = df.groupby(columns, observed=True, sort=True)['no_show']
+    table = grouped.agg(['size', 'sum']).astype('int64')
+    return table.rename(columns={'size': 'count', 'sum': 'no_show'})
+
+
+def missed_flags(df):
+    """no_show as 0/1 int8, ready to be added to bincount codes."""
+    return (df['no_show'].to_numpy() != 0).view(np.int8)
+
+
+def count_codes(codes, size, missed):
+    """Appointments and no-shows per code, in a single bincount.
+
+    Bin 2 * (code + 1) + no_show holds both numbers for a code, and the
+    missing code -1 lands in the first pair, which is dropped.
+    """
+    pairs = np.bincount((codes + 1) * 2 + missed, minlength=2 * (size + 1))
+    pairs = pairs.reshape(-1, 2)[1:]
+    return pairs.sum(axis=1), pairs[:, 1]
+
+
+def level_table(df, column, levels=None):
+    """Appointments and no-shows per level of an integer-coded column.
+
+    levels defaults to every integer from min(0, lowest value) to the
+    highest value; levels absent from the data get a zero count, values
+    outside the levels are left out. One bincount over the offset values.
+    """
+    values = df[column].to_numpy().astype(np.int64)
+    if levels is None:
+        high = values.max() if len(values) else -1
+        low = min(0, values.min()) if len(values) else 0
+        levels = np.arange(low, high + 1)
+    levels = np.asarray(levels, dtype=np.int64)
+    if not len(levels):
+        return pd.DataFrame({'count': [], 'no_show': []}, dtype='int64',
+                            index=pd.Index(levels, name=column))
+    low = levels.min()
+    size = int(levels.max() - low + 1)
+    codes = values - low
+    codes[(codes < 0) | (codes >= size)] = -1
+    count, no_show = count_codes(codes, size, missed_flags(df))
+    return pd.DataFrame({'count': count[levels - low], 'no_show': no_show[levels - low]},
+                        index=pd.Index(levels, name=column))
+
+
+def level_rates(df, column, levels=None):
+    """level_table() with the rate and share columns (NaN rate for absent levels)."""
+    return with_rates(level_table(df, column, levels))
+
+
+def merge_tables(*tables):
+    """Add up rate tables of disjoint parts of the data."""
+    merged = pd.concat(tables)
+    #observed=True: categories absent from every table must not come back as zero rows
+    return merged.groupby(level=list(range(merged.index.nlevels)), observed=True,
+                          sort=True).sum()
+
+
+def _plain(index):
+    if isinstance(index, pd.CategoricalIndex):
+        return index.astype(index.categories.dtype)
+    return index
+
+
+def plain_index(table):
+    """Replace categorical index levels by their plain values, keeping the order."""
+    index = table.index
+    if isinstance(index, pd.MultiIndex):
+        index = index.set_levels([_plain(level) for level in index.levels])
+    return table.set_axis(_plain(index))
+
+
+def with_rates(table):
+    """Add rate (no-shows per appointment) and share (of all no-shows), in %."""
+    return table.assign(rate=table['no_show'] / table['count'] * 100,
+                        share=table['no_show'] / table['no_show'].sum() * 100)
+
+
+def rate_tables(df, dimensions=DIMENSIONS):
+    """rate_table() of every dimension, in memory."""
+    return {name: plain_index(rate_table(df, columns))
+            for name, columns in dimensions.items()}
@@ -0,0 +1,170 @@
+"""
+Batch no-show risk scoring of incoming appointments
+
+Scores records with the raw columns of noshow.csv (Gender, Age,
+Neighbourhood, the flags, Handcap, ScheduledDay, AppointmentDay) with a
+model saved by noshow.model. The model file is turned once into lookup
+tables: a dict per text field, an array indexed by the value for the
+integer fields and by the age, and the lead-time bin edges. Lead days
+are counted on the wall clock of the zone the model was trained in
+(noshow.loader.FEED_TZ, saved in the file). A batch is
+then mapped to one weight index per field and scored by summing the
+weights of each row, the dot product of its one-hot row with the
+weights. Only NumPy is used, pandas is not imported.
+
+Usage: python -m noshow.scoring MODEL.npz RECORDS.csv  (prints AppointmentID,probability)
+"""
+
+import argparse
+import csv
+from datetime import datetime
+from itertools import repeat
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+#noshow.model.MODEL_VERSION, not imported from there to keep pandas out
+MODEL_VERSION = 3
+
+#Field of the model -> raw column of the records
+RAW_COLUMNS = {
+    'gender': 'Gender',
+    'neighbourhood': 'Neighbourhood',
+    'age_stages': 'Age',
+    'handcap': 'Handcap',
+    'scholarship': 'Scholarship',
+    'hipertension': 'Hipertension',
+    'diabetes': 'Diabetes',
+    'alcoholism': 'Alcoholism',
+    'sms_received': 'SMS_received',
+}
+TEXT_FIELDS = ['gender', 'neighbourhood']
+
+
+def _int_lut(levels):
+    """Array mapping every value from 0 to the highest level to its slot (0 if none)."""
+    lut = np.zeros(max(levels) + 1, dtype=np.int32)
+    lut[levels] = np.arange(1, len(levels) + 1)
+    return lut
+
+
+def _lookup(lut, values):
+    values = np.asarray(values, dtype=np.int64)
+    inside = (values >= 0) & (values < len(lut))
+    return np.where(inside, lut[np.where(inside, values, 0)], 0)
+
+
+def _bin_slots(edges, values):
+    """Slot of the (edges[i], edges[i + 1]] bin of every value, 0 outside the edges."""
+    bins = np.searchsorted(edges, values, side='left')
+    return np.where((values > edges[0]) & (values <= edges[-1]), bins, 0)
+
+
+def _offset_seconds(text):
+    """UTC offset at the end of an ISO timestamp (+HH:MM or +HHMM), in seconds.
+
+    0 for Z or no offset: those are read as UTC, as the loader does.
+    """
+    if len(text) <= 19:
+        return 0
+    if text[-6] in '+-' and text[-3] == ':':
+        sign, hours, minutes = text[-6], text[-5:-3], text[-2:]
+    elif text[-5] in '+-' and text[-4:].isdigit():
+        sign, hours, minutes = text[-5], text[-4:-2], text[-2:]
+    else:
+        return 0
+    seconds = int(hours) * 3600 + int(minutes) * 60
+    return -seconds if sign == '-' else seconds
+
+
+def utc_seconds(values):
+    """Seconds since 1970 UTC of ISO strings (their offset applied), datetimes or datetime64 values."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'UO' and len(values) and isinstance(values.flat[0], str):
+        offsets = np.fromiter(map(_offset_seconds, values.flat), dtype=np.int64, count=values.size)
+        return values.astype('U19').astype('datetime64[s]').astype(np.int64) - offsets
+    return values.astype('datetime64[s]').astype(np.int64)
+
+
+def day_numbers(values, tz='UTC'):
+    """Calendar days since 1970 on the wall clock of tz, like noshow.loader.day_numbers."""
+    seconds = utc_seconds(values)
+    if tz not in (None, 'UTC'):
+        #The zone's offset, looked up once per distinct instant
+        zone = ZoneInfo(tz)
+        instants, inverse = np.unique(seconds, return_inverse=True)
+        shift = np.fromiter((datetime.fromtimestamp(int(t), zone).utcoffset().total_seconds()
+                             for t in instants), dtype=np.int64, count=len(instants))
+        seconds = seconds + shift[inverse]
+    return seconds // 86_400
+
+
+class Scorer:
+    """No-show probabilities of raw appointment records."""
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as f:
+            if int(f['version']) != MODEL_VERSION:
+                raise ValueError(f'{path} was saved by another version of the model')
+            self.fields = f['fields'].tolist()
+            self.weights = f['weights'].astype(np.float64)
+            self.bias = float(f['bias'])
+            levels = {field: f[f'levels_{field}'].tolist() for field in self.fields}
+            age_edges = f['age_edges']
+            self.lead_edges = f['lead_edges']
+            self.tz = str(f['tz'])
+        sizes = [len(levels[field]) + 1 for field in self.fields]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))[:-1].astype(np.int32)
+
+        self.text = {field: {value: slot for slot, value in enumerate(levels[field], 1)}
+                     for field in TEXT_FIELDS}
+        self.ints = {field: _int_lut(levels[field]) for field in self.fields
+                     if field not in TEXT_FIELDS and field not in ('age_stages', 'lead_stages')}
+        #Whole ages are binned once: age -> slot of its stage
+        ages = np.arange(int(age_edges[-1]) + 1)
+        self.ints['age_stages'] = _bin_slots(age_edges, ages).astype(np.int32)
+
+    def slots(self, columns):
+        """int32 matrix of weight indices of a batch given as raw columns."""
+        rows = len(columns['Age'])
+        index = np.empty((rows, len(self.fields)), dtype=np.int32)
+        for i, field in enumerate(self.fields):
+            if field == 'lead_stages':
+                lead = (day_numbers(columns['AppointmentDay'], self.tz)
+                        - day_numbers(columns['ScheduledDay'], self.tz))
+                slot = _bin_slots(self.lead_edges, lead)
+            elif field in self.text:
+                values = columns[RAW_COLUMNS[field]]
+                slot = np.fromiter(map(self.text[field].get, values, repeat(0, rows)),
+                                   dtype=np.int32, count=rows)
+            else:
+                slot = _lookup(self.ints[field], columns[RAW_COLUMNS[field]])
+            index[:, i] = slot + self.offsets[i]
+        return index
+
+    def score_columns(self, columns):
+        """Probabilities of a batch given as a dict of raw column -> sequence."""
+        z = self.weights[self.slots(columns)].sum(axis=1) + self.bias
+        return 1 / (1 + np.exp(-z))
+
+    def score(self, records):
+        """Probabilities of a batch of records, each a dict of raw column -> value."""
+        names = list(RAW_COLUMNS.values()) + ['ScheduledDay', 'AppointmentDay']
+        return self.score_columns({name: [record[name] for record in records] for name in names})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model', help='.npz saved by noshow.model')
+    parser.add_argument('records', help='CSV with the columns of noshow.csv')
+    args = parser.parse_args(argv)
+
+    scorer = Scorer(args.model)
+    with open(args.records, newline='', encoding='utf-8') as f:
+        records = list(csv.DictReader(f))
+    for record, p in zip(records, scorer.score(records)):
+        print(f'{record.get("AppointmentID", "")},{p:.4f}')
+
+
+if __name__ == '__main__':
+    main()
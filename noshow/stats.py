@@ -0,0 +1,156 @@
+"""
+Confidence intervals of the no-show rates
+
+Every rate table (count and no_show per key, see noshow.rates) can get
+an interval around each rate, in %:
+
+- wilson: the closed-form Wilson score interval of each rate, which
+  stays inside [0, 100] and is sensible for the tiny handcap levels.
+- bootstrap: percentile intervals of the rate and the share from
+  multinomial draws over the aggregated cells of the table (show and
+  no-show of every key), never from the raw rows. The replicates of all
+  tables are split in blocks of BLOCK and drawn in a process pool, each
+  block from its own seed, so the result does not depend on the pool.
+
+Usage: python -m noshow.stats [INPUT] [-n 10000] [-j JOBS] [-o intervals.json]
+"""
+
+import argparse
+import json
+import time
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+
+from noshow.rates import with_rates
+
+CONFIDENCE = 0.95
+REPLICATES = 10_000
+
+#Replicates drawn by one task of the pool
+BLOCK = 1_000
+
+
+def _z(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(no_show, count, confidence=CONFIDENCE):
+    """(low, high) Wilson score interval of no_show / count, in %; NaN where count is 0."""
+    no_show = np.asarray(no_show, dtype=np.float64)
+    count = np.asarray(count, dtype=np.float64)
+    z2 = _z(confidence) ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = no_show / count
+        scale = 1 + z2 / count
+        center = (p + z2 / (2 * count)) / scale
+        half = np.sqrt(p * (1 - p) / count + z2 / (4 * count * count)) * np.sqrt(z2) / scale
+    return (center - half) * 100, (center + half) * 100
+
+
+def with_wilson(table, confidence=CONFIDENCE):
+    """with_rates() plus the rate_low and rate_high Wilson bounds."""
+    low, high = wilson_interval(table['no_show'], table['count'], confidence)
+    return with_rates(table).assign(rate_low=low, rate_high=high)
+
+
+def _cells(table):
+    """Shows and no-shows of every key, side by side: 2 * keys cells."""
+    no_show = table['no_show'].to_numpy(dtype=np.int64)
+    return np.column_stack((table['count'].to_numpy(dtype=np.int64) - no_show, no_show)).ravel()
+
+
+def draw_replicates(cells, replicates, seed):
+    """Rates and shares (replicates x keys, in %) of multinomial redraws of cells."""
+    total = int(cells.sum())
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(total, cells / total, size=replicates).reshape(replicates, -1, 2)
+    no_show = draws[:, :, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = no_show / draws.sum(axis=2) * 100
+        share = no_show / no_show.sum(axis=1, keepdims=True) * 100
+    return rate, share
+
+
+def _draw_task(task):
+    return draw_replicates(*task)
+
+
+def _bounds(values, confidence):
+    alpha = (1 - confidence) / 2
+    #Keys drawn with no appointment at all in every replicate stay NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanquantile(values, [alpha, 1 - alpha], axis=0)
+
+
+def bootstrap_tables(tables, replicates=REPLICATES, confidence=CONFIDENCE, seed=0, jobs=None):
+    """with_rates() of every table of {name: table}, plus bootstrap rate and share bounds."""
+    names = [name for name in tables if tables[name]['count'].sum() > 0]
+    blocks = [min(BLOCK, replicates - start) for start in range(0, replicates, BLOCK)]
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(names) * len(blocks)))
+    tasks = [(_cells(tables[name]), size, next(seeds)) for name in names for size in blocks]
+    if jobs == 1 or len(tasks) <= 1:
+        draws = [_draw_task(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            draws = list(pool.map(_draw_task, tasks))
+
+    out = {name: with_rates(table) for name, table in tables.items()}
+    for i, name in enumerate(names):
+        mine = draws[i * len(blocks):(i + 1) * len(blocks)]
+        rate = _bounds(np.concatenate([rate for rate, _ in mine]), confidence)
+        share = _bounds(np.concatenate([share for _, share in mine]), confidence)
+        out[name] = out[name].assign(rate_low=rate[0], rate_high=rate[1],
+                                     share_low=share[0], share_high=share[1])
+    return out
+
+
+def bootstrap(table, replicates=REPLICATES, confidence=CONFIDENCE, seed=0, jobs=1):
+    """bootstrap_tables() of a single table."""
+    return bootstrap_tables({None: table}, replicates, confidence, seed, jobs)[None]
+
+
+def with_intervals(table, method='wilson', confidence=CONFIDENCE, **kwargs):
+    """with_rates() plus rate_low and rate_high by method ('wilson' or 'bootstrap')."""
+    if method == 'wilson':
+        return with_wilson(table, confidence)
+    if method == 'bootstrap':
+        return bootstrap(table, confidence=confidence, **kwargs)
+    raise ValueError(f"unknown interval method {method!r}, expected 'wilson' or 'bootstrap'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', nargs='?', help='CSV file or archive (noshow.csv by default)')
+    parser.add_argument('-n', '--replicates', type=int, default=REPLICATES)
+    parser.add_argument('-c', '--confidence', type=float, default=CONFIDENCE)
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None, help='JSON file to write the tables to')
+    args = parser.parse_args(argv)
+
+    from noshow.cache import load_clean
+    from noshow.cube import build_cube
+
+    cube = build_cube(load_clean(args.input))
+    tables = {name: cube[name] for name in cube}
+    start = time.perf_counter()
+    out = bootstrap_tables(tables, args.replicates, args.confidence, args.seed, args.jobs)
+    seconds = time.perf_counter() - start
+    for name, table in out.items():
+        low, high = wilson_interval(table['no_show'], table['count'], args.confidence)
+        print(f'\n{name}\n{table.assign(wilson_low=low, wilson_high=high).round(2)}')
+    print(f'\n{args.replicates} replicates of {len(out)} tables in {seconds:.2f} s')
+    if args.output:
+        doc = {name: json.loads(table.reset_index().to_json(orient='records'))
+               for name, table in out.items()}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, indent=1, ensure_ascii=False)
+        print(f'intervals written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
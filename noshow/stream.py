@@ -0,0 +1,61 @@
+"""
+Chunked aggregation of the no-show rate tables
+
+The file is read, cleaned and counted (see noshow.cube) chunk by chunk,
+and only the per-key counts are kept between chunks, so memory depends on the number
+of distinct keys and the chunk size, never on the size of the file.
+
+Usage: python -m noshow.stream [noshow.csv | archive] [--chunksize N]
+"""
+
+import argparse
+
+from noshow.clean import clean
+from noshow.loader import iter_noshow
+from noshow.cube import RateCube, build_cube
+from noshow.rates import DIMENSIONS, with_rates
+
+
+class RateAccumulator:
+    """Running rate tables for a set of dimensions."""
+
+    def __init__(self, dimensions=DIMENSIONS, crosses=()):
+        self.dimensions = dict(dimensions)
+        self.crosses = list(crosses)
+        self.cube = RateCube()
+
+    def update(self, df):
+        """Add a cleaned chunk."""
+        self.cube.merge(build_cube(df, self.dimensions, self.crosses))
+        return self
+
+    def merge(self, other):
+        """Add the tables of an accumulator fed with other data."""
+        self.cube.merge(other.cube)
+        return self
+
+    def tables(self):
+        return {name: self.cube[name] for name in self.cube}
+
+
+def stream_rates(source=None, chunksize=100_000, dimensions=DIMENSIONS):
+    """Rate tables of a whole file, read chunksize rows at a time."""
+    acc = RateAccumulator(dimensions)
+    for chunk in iter_noshow(source, chunksize=chunksize):
+        acc.update(clean(chunk))
+    return acc.tables()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=None)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    for name, table in stream_rates(args.source, args.chunksize).items():
+        print(f'\n{name}')
+        print(with_rates(table))
+
+
+if __name__ == '__main__':
+    main()
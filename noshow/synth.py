@@ -0,0 +1,104 @@
+"""
+Seeded synthetic no-show data shaped like noshow.csv
+
+The marginal distributions (gender, age, neighbourhood, the flags,
+handcap, SMS, appointment days and lead times) are taken from a real
+file, and the no-show flag is drawn with the real rate of each
+sms_received value. Every column is drawn with one vectorized NumPy call
+per block, so tens of millions of rows are written in bounded memory.
+
+Usage: python -m noshow.synth ROWS OUTPUT.csv [--seed N] [--source noshow.csv]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from noshow.loader import COLUMNS, FLAG_COLUMNS, load_noshow
+
+BLOCK_ROWS = 1_000_000
+
+#Scheduling hours seen in the data, 06:00 to 21:00
+DAY_SECONDS = (6 * 3600, 21 * 3600)
+
+
+def _distribution(series):
+    counts = series.value_counts(sort=False)
+    counts = counts[counts > 0]
+    return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+
+class Marginals:
+    """Value/probability pairs of every column of a loaded noshow frame."""
+
+    def __init__(self, df):
+        self.columns = {col: _distribution(df[col])
+                        for col in ['gender', 'age', 'neighbourhood', 'handcap', 'sms_received']
+                        + [col.lower() for col in FLAG_COLUMNS if col != 'SMS_received']}
+        days = df['appointmentday'].dt.tz_localize(None).to_numpy().astype('datetime64[D]')
+        self.columns['appointmentday'] = _distribution(pd.Series(days))
+        lead = days - df['scheduledday'].dt.tz_localize(None).to_numpy().astype('datetime64[D]')
+        self.columns['lead_days'] = _distribution(pd.Series(lead.astype(np.int64).clip(0)))
+        rates = df.groupby('sms_received')['no_show'].mean()
+        self.sms_levels = rates.index.to_numpy()
+        self.no_show_rate = rates.to_numpy()
+
+    def draw(self, rng, col, rows):
+        values, probabilities = self.columns[col]
+        return values[rng.choice(len(values), size=rows, p=probabilities)]
+
+
+def synthesize(rows, marginals, seed=0, first_id=0):
+    """One block of rows with the columns of noshow.csv, in its raw format."""
+    rng = np.random.default_rng(seed)
+    appointment = marginals.draw(rng, 'appointmentday', rows).astype('datetime64[s]')
+    lead = marginals.draw(rng, 'lead_days', rows).astype('timedelta64[D]')
+    seconds = rng.integers(*DAY_SECONDS, size=rows).astype('timedelta64[s]')
+    scheduled = appointment - lead + seconds
+
+    sms = marginals.draw(rng, 'sms_received', rows)
+    no_show_rate = marginals.no_show_rate[np.searchsorted(marginals.sms_levels, sms)]
+    missed = rng.random(rows) < no_show_rate
+
+    data = {
+        'PatientId': rng.integers(1e10, 1e15, size=max(rows // 2, 1))[rng.integers(0, max(rows // 2, 1), rows)],
+        'AppointmentID': np.arange(first_id, first_id + rows) + 5_000_000,
+        'Gender': marginals.draw(rng, 'gender', rows),
+        'ScheduledDay': np.datetime_as_string(scheduled, unit='s', timezone='UTC'),
+        'AppointmentDay': np.datetime_as_string(appointment, unit='s', timezone='UTC'),
+        'Age': marginals.draw(rng, 'age', rows),
+        'Neighbourhood': marginals.draw(rng, 'neighbourhood', rows),
+    }
+    for col in FLAG_COLUMNS + ['Handcap']:
+        if col != 'SMS_received':
+            data[col] = marginals.draw(rng, col.lower(), rows)
+    data['SMS_received'] = sms
+    data['No-show'] = np.where(missed, 'Yes', 'No')
+    return pd.DataFrame(data, columns=['PatientId', 'AppointmentID'] + COLUMNS)
+
+
+def write_csv(path, rows, seed=0, source=None, block_rows=BLOCK_ROWS):
+    """Write rows synthetic appointments to path, block_rows at a time."""
+    marginals = Marginals(load_noshow(source))
+    written = 0
+    for block, start in enumerate(range(0, rows, block_rows)):
+        size = min(block_rows, rows - start)
+        frame = synthesize(size, marginals, seed=[seed, block], first_id=start)
+        frame.to_csv(path, mode='w' if block == 0 else 'a', header=block == 0, index=False)
+        written += size
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('output')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=None, help='real file to take the distributions from')
+    args = parser.parse_args(argv)
+    print(f'{write_csv(args.output, args.rows, args.seed, args.source)} rows written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+No-show counts and rates per calendar period
+
+Timestamps are bucketed into months, weeks (Monday to Sunday) or days by
+casting the datetime64 values, and every bucket is counted in one
+bincount. The result covers the whole span of the data, across years,
+with a PeriodIndex, so the labels come from the data instead of being
+typed in.
+"""
+
+import numpy as np
+import pandas as pd
+
+from noshow.loader import FEED_TZ
+from noshow.rates import count_codes, missed_flags, with_rates
+
+#freq -> (period frequency for the labels, unit of the bucket number)
+FREQS = {
+    'M': ('M', 'M'),
+    'W': ('W-SUN', 'W'),
+    'D': ('D', 'D'),
+}
+
+
+def period_numbers(times, freq='M', tz=FEED_TZ):
+    """Bucket number of every timestamp: months/weeks/days since 1970.
+
+    Aware timestamps are bucketed on the wall clock of tz (by default
+    the feed's, see noshow.loader.FEED_TZ; None for their own zone). Weeks start on Monday; missing times give -1 with a
+    mask of them.
+    """
+    if times.dt.tz is not None:
+        if tz is not None:
+            times = times.dt.tz_convert(tz)
+        times = times.dt.tz_localize(None)
+    values = times.to_numpy()
+    missing = np.isnat(values)
+    unit = FREQS[freq][1]
+    if unit == 'W':
+        #1970-01-01 is a Thursday, +3 days puts week boundaries on Mondays
+        numbers = (values.astype('datetime64[D]').astype(np.int64) + 3) // 7
+    else:
+        numbers = values.astype(f'datetime64[{unit}]').astype(np.int64)
+    return numbers, missing
+
+
+def _period_index(first, size, freq):
+    if freq == 'W':
+        start = np.datetime64(int(first) * 7 - 3, 'D')
+    else:
+        start = np.datetime64(int(first), FREQS[freq][1])
+    return pd.period_range(start=pd.Timestamp(start), periods=size, freq=FREQS[freq][0])
+
+
+def period_table(df, column='scheduledday', freq='M', tz=FEED_TZ):
+    """Appointments and no-shows per period of column, empty periods included."""
+    numbers, missing = period_numbers(df[column], freq, tz)
+    if missing.all():
+        return pd.DataFrame({'count': [], 'no_show': []}, dtype='int64',
+                            index=pd.PeriodIndex([], freq=FREQS[freq][0], name=column))
+    first = numbers[~missing].min()
+    size = int(numbers[~missing].max() - first + 1)
+    codes = np.where(missing, -1, numbers - first)
+    missed = missed_flags(df)
+    count, no_show = count_codes(codes, size, missed)
+    index = _period_index(first, size, freq).rename(column)
+    return pd.DataFrame({'count': count, 'no_show': no_show}, index=index)
+
+
+def period_rates(df, column='scheduledday', freq='M', tz=FEED_TZ):
+    """period_table() with the rate and share columns (NaN rate for empty periods)."""
+    return with_rates(period_table(df, column, freq, tz))
+
+
+def fill_span(table):
+    """Add the empty periods between the first and last one of a period table.
+
+    Needed after merging the tables of parts of the data with merge_tables().
+    """
+    if not len(table):
+        return table
+    index = pd.period_range(table.index.min(), table.index.max(),
+                            freq=table.index.freq, name=table.index.name)
+    return table.reindex(index, fill_value=0)
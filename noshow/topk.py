@@ -0,0 +1,171 @@
+"""
+Top-k heavy hitters of high-cardinality columns, plus an OTHERS remainder
+
+Exact mode: top_k() takes per-key totals (a groupby sum or a rate
+table column) and picks the k largest with np.partition, without
+sorting every key. Streaming mode: SpaceSaving keeps at most capacity
+counters while chunks are added, so memory does not grow with the
+number of distinct keys. Every counter carries its maximum
+overestimate, and any key whose total is above SpaceSaving.floor is
+guaranteed to be tracked. Both give the top k and an OTHERS row with
+the rest of the total, ready for a pie chart.
+
+Usage: python -m noshow.topk [noshow.csv | archive] [--column neighbourhood] [-k 5] [--capacity N]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from noshow.clean import clean
+from noshow.loader import iter_noshow
+
+OTHERS = 'OTHERS'
+
+
+def _largest(values, k):
+    """Positions of the k largest values, largest first (first position wins ties)."""
+    values = np.asarray(values)
+    if k < len(values):
+        #Everything above the k-th largest plus enough of the ties with it
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:k - len(above)]
+        picked = np.concatenate((above, ties))
+    else:
+        picked = np.arange(len(values))
+    return picked[np.lexsort((picked, -values[picked]))]
+
+
+def top_k(totals, k=5, total=None, others=OTHERS):
+    """The k keys with the largest totals and an others row with the remainder.
+
+    totals is a Series indexed by key; total defaults to its sum, pass
+    the real total when totals covers only part of the keys.
+    """
+    top = totals.iloc[_largest(totals.to_numpy(), k)]
+    total = totals.sum() if total is None else total
+    rest = pd.Series([total - top.sum()], index=[others])
+    return pd.concat([top.set_axis(top.index.astype(object)), rest]).rename(totals.name)
+
+
+def exact_top_k(df, column, k=5, weight='no_show', others=OTHERS):
+    """top_k() of the sum of weight per value of column, from a frame."""
+    totals = df.groupby(column, observed=True, sort=False)[weight].sum()
+    return top_k(totals, k, others=others)
+
+
+class SpaceSaving:
+    """Space-Saving sketch of weighted key totals over a stream of chunks.
+
+    Holds at most capacity keys. count[key] never underestimates the
+    true total and count[key] - error[key] never overestimates it. A key
+    that is not tracked has a total of at most floor, so every key above
+    floor is tracked. A chunk is added as its exact per-key sums, with
+    vectorized operations.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.count = pd.Series(dtype='float64')
+        self.error = pd.Series(dtype='float64')
+        self.floor = 0.0
+        self.total = 0.0
+
+    def update(self, keys, weights=None):
+        """Add a chunk: keys and their weights (1 each by default)."""
+        keys = pd.Series(np.asarray(keys))
+        weights = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype='float64')
+        sums = pd.Series(weights).groupby(keys.to_numpy(), sort=False).sum()
+        return self.merge_counts(sums)
+
+    def _bounds_over(self, keys):
+        """Upper and lower bound of the totals of keys; untracked ones are 0 to floor."""
+        upper = self.count.reindex(keys, fill_value=self.floor)
+        lower = (self.count - self.error).reindex(keys, fill_value=0)
+        return upper, lower
+
+    def _add(self, upper, lower, floor, total):
+        """Add the bounds of other data, over the keys tracked by either side."""
+        keys = self.count.index.union(upper.index)
+        own_upper, own_lower = self._bounds_over(keys)
+        count = own_upper + upper.reindex(keys, fill_value=floor)
+        error = count - own_lower - lower.reindex(keys, fill_value=0)
+        self.floor += floor
+        self.total += total
+        if len(count) > self.capacity:
+            keep = np.sort(_largest(count.to_numpy(), self.capacity))
+            dropped = np.ones(len(count), dtype=bool)
+            dropped[keep] = False
+            self.floor = max(self.floor, float(count.to_numpy()[dropped].max()))
+            count, error = count.iloc[keep], error.iloc[keep]
+        self.count, self.error = count, error
+        return self
+
+    def merge_counts(self, sums):
+        """Add exact per-key totals of data not seen before."""
+        sums = sums[sums > 0].astype('float64')
+        return self._add(sums, sums, 0.0, float(sums.sum()))
+
+    def merge(self, other):
+        """Add a sketch of other data, e.g. of another file or process."""
+        return self._add(*other._bounds_over(other.count.index), other.floor, other.total)
+
+    def bounds(self):
+        """Frame of the tracked keys: estimate, lower and upper bound of their totals."""
+        return pd.DataFrame({'estimate': self.count, 'lower': self.count - self.error,
+                             'upper': self.count}).sort_values('estimate', ascending=False)
+
+    def top_k(self, k=5, others=OTHERS):
+        """The k largest estimated totals and the rest of the total as others.
+
+        The estimates are upper bounds, so others may be short by at most
+        the sum of their errors.
+        """
+        return top_k(self.count, k, total=self.total, others=others)
+
+    def guaranteed(self, k=5):
+        """Whether the top k are certainly the true top k.
+
+        True when every lower bound of the top k is at least the upper
+        bound of every other key, tracked or not.
+        """
+        order = _largest(self.count.to_numpy(), len(self.count))
+        if len(order) <= k:
+            return True
+        lower = (self.count - self.error).to_numpy()[order[:k]].min()
+        upper = max(self.count.to_numpy()[order[k]], self.floor)
+        return bool(lower >= upper)
+
+
+def stream_top_k(source=None, column='neighbourhood', k=5, capacity=1000,
+                 weight='no_show', chunksize=100_000):
+    """SpaceSaving sketch of the sum of weight per value of column, over a whole file."""
+    sketch = SpaceSaving(capacity)
+    for chunk in iter_noshow(source, chunksize=chunksize):
+        chunk = clean(chunk)
+        sketch.update(chunk[column].to_numpy(), chunk[weight].to_numpy())
+    return sketch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=None)
+    parser.add_argument('--column', default='neighbourhood')
+    parser.add_argument('--weight', default='no_show', help='column summed per key')
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--capacity', type=int, default=1000, help='counters kept by the sketch')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    sketch = stream_top_k(args.source, args.column, args.k, args.capacity, args.weight,
+                          args.chunksize)
+    top = sketch.top_k(args.k)
+    print(pd.DataFrame({args.weight: top, 'share': top / sketch.total * 100}))
+    print(f'\nUntracked keys total at most {sketch.floor:g}; top {args.k} '
+          f'{"guaranteed" if sketch.guaranteed(args.k) else "not guaranteed"} exact')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Rule-based validation of the loaded no-show frame
+
+The rules are declared in RULES: the age range, a non-negative handcap
+count, the 0/1 flags, the known genders and an appointment day that is not before
+the day of its scheduling. Each rule is one vectorized mask over its
+column, all of them are evaluated in the same pass, and the rows that
+fail any rule are quarantined in bulk with the names of the rules they
+broke. Works chunk by chunk (see Validator), on the analysis names given
+by noshow.loader.tidy().
+
+Usage: python -m noshow.validate [INPUT ...] [-q quarantine.csv]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from noshow.loader import FEED_TZ, day_numbers, default_source, iter_noshow
+
+FLAG_COLUMNS = ['scholarship', 'hipertension', 'diabetes', 'alcoholism', 'sms_received',
+                'no_show']
+
+
+class InRange:
+    """low <= column <= high."""
+
+    def __init__(self, name, column, low, high):
+        self.name, self.column, self.low, self.high = name, column, low, high
+
+    def mask(self, df, tz=FEED_TZ):
+        values = df[self.column].to_numpy()
+        return (values >= self.low) & (values <= self.high)
+
+
+class InSet:
+    """column is one of values; nulls fail."""
+
+    def __init__(self, name, column, values):
+        self.name, self.column, self.values = name, column, list(values)
+
+    def mask(self, df, tz=FEED_TZ):
+        series = df[self.column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            #Check the categories once and look the codes up; code -1 (null) hits the False
+            allowed = np.append(series.cat.categories.isin(self.values), False)
+            return allowed[series.cat.codes.to_numpy()]
+        return series.isin(self.values).to_numpy()
+
+
+class NotBefore:
+    """The calendar day of column is not before the calendar day of other, on the clock of tz."""
+
+    def __init__(self, name, column, other):
+        self.name, self.column, self.other = name, column, other
+
+    def mask(self, df, tz=FEED_TZ):
+        first, second = df[self.column], df[self.other]
+        #A missing date fails (NaT becomes the lowest int64 day number)
+        valid = first.notna().to_numpy() & second.notna().to_numpy()
+        return valid & (day_numbers(first, tz) >= day_numbers(second, tz))
+
+
+#Any disability count is kept (levels are not fixed, see noshow.rates.level_table);
+#the cap is only that of the int8 column of the loader
+RULES = [InRange('age_range', 'age', 0, 115),
+         InRange('handcap_count', 'handcap', 0, np.iinfo(np.int8).max)]
+RULES += [InSet(f'{col}_flag', col, (0, 1)) for col in FLAG_COLUMNS]
+RULES += [InSet('gender_known', 'gender', ('F', 'M')),
+          NotBefore('appointment_after_scheduling', 'appointmentday', 'scheduledday')]
+
+
+def rule_masks(df, rules=RULES, tz=FEED_TZ):
+    """Boolean array of rules x rows, True where the row passes the rule.
+
+    tz is the zone whose calendar days the date rules compare.
+    """
+    masks = np.empty((len(rules), len(df)), dtype=bool)
+    for i, rule in enumerate(rules):
+        masks[i] = rule.mask(df, tz)
+    return masks
+
+
+def _failed_names(masks, rules):
+    """Comma-separated names of the rules broken by each row of masks."""
+    bits = (~masks).T.astype(np.int64) @ (np.int64(1) << np.arange(len(rules), dtype=np.int64))
+    patterns, inverse = np.unique(bits, return_inverse=True)
+    names = [','.join(rule.name for i, rule in enumerate(rules) if pattern >> i & 1)
+             for pattern in patterns]
+    return np.array(names, dtype=object)[inverse]
+
+
+def validate(df, rules=RULES, tz=FEED_TZ):
+    """(valid rows, quarantined rows with a failed_rules column, violations per rule)."""
+    masks = rule_masks(df, rules, tz)
+    valid = masks.all(axis=0)
+    violations = pd.Series(len(df) - masks.sum(axis=1), index=[rule.name for rule in rules],
+                           name='violations')
+    quarantine = df[~valid].copy()
+    quarantine['failed_rules'] = _failed_names(masks[:, ~valid], rules)
+    return df[valid], quarantine, violations
+
+
+def drop_invalid(df, rules=RULES, tz=FEED_TZ):
+    """The rows of df that pass every rule."""
+    return df[rule_masks(df, rules, tz).all(axis=0)]
+
+
+class Validator:
+    """Violation counts and quarantined rows over a stream of chunks."""
+
+    def __init__(self, rules=RULES, tz=FEED_TZ):
+        self.rules = rules
+        self.tz = tz
+        self.rows = 0
+        self.violations = pd.Series(0, index=[rule.name for rule in rules], name='violations')
+        self.quarantined = []
+
+    def update(self, df):
+        """Validate a chunk and return its valid rows."""
+        valid, quarantine, violations = validate(df, self.rules, self.tz)
+        self.rows += len(df)
+        self.violations += violations
+        if len(quarantine):
+            self.quarantined.append(quarantine)
+        return valid
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.violations += other.violations
+        self.quarantined.extend(other.quarantined)
+        return self
+
+    @property
+    def quarantine(self):
+        if not self.quarantined:
+            return pd.DataFrame(columns=['failed_rules'])
+        return pd.concat(self.quarantined, ignore_index=True)
+
+
+def validate_source(source=None, chunksize=100_000, rules=RULES):
+    """Validator of a whole file, read chunk by chunk."""
+    validator = Validator(rules)
+    for chunk in iter_noshow(source, chunksize=chunksize):
+        validator.update(chunk)
+    return validator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='*', help='CSV files or archives (noshow.csv by default)')
+    parser.add_argument('-q', '--quarantine', default=None,
+                        help='CSV file to write the failing rows to')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    validator = Validator()
+    for source in args.inputs or [default_source()]:
+        validator.merge(validate_source(source, args.chunksize))
+    print(f'{validator.rows} rows, {sum(map(len, validator.quarantined))} quarantined\n')
+    print(validator.violations.to_string())
+    if args.quarantine:
+        validator.quarantine.to_csv(args.quarantine, index=False)
+        print(f'\nquarantined rows written to {args.quarantine}')
+
+
+if __name__ == '__main__':
+    main()
@@ -50,9 +50,6 @@
 
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 get_ipython().run_line_magic('matplotlib', 'inline')
 
@@ -60,7 +57,11 @@ get_ipython().run_line_magic('matplotlib', 'inline')
 # In[217]:
 
 
-df = pd.read_csv('noshow.csv')
+from noshow.cache import load_clean
+
+#Loaded and cleaned once, then read back from the cache next to the CSV.
+#Without a loose noshow.csv the one in the zip/rar archives is read directly
+df = load_clean()
 df.head()
 
 
@@ -90,8 +91,8 @@ df.nunique()
 # In[221]:
 
 
-#Drop PatientID and AppointmentID
-df.drop(['PatientId', 'AppointmentID'], axis=1, inplace=True)
+#PatientID and AppointmentID are not loaded at all
+df.columns
 
 
 # - PatientID is less than AppointmentID which indicates that many patients scheduled more than one visit in the period
@@ -100,31 +101,19 @@ df.drop(['PatientId', 'AppointmentID'], axis=1, inplace=True)
 # In[222]:
 
 
-#Rename Columns
-df.rename(columns=lambda x: x.lower(), inplace=True)
-df.rename(index=str, columns={"no-show": "no_show"}, inplace=True)
-
-df.head()
-
-
-# In[223]:
-
-
-#Change Data Type
-
-df['no_show'] = df.no_show.replace({'Yes': 1, 'No': 0})
-#df['gender'] = df.gender.replace({'M': 1, 'F': 0})
-
-df['scheduledday'] = pd.to_datetime(df.scheduledday)
-df['appointmentday'] = pd.to_datetime(df.appointmentday)
-
+#Columns come renamed, no_show as 1/0 and the dates already parsed
 df.info()
 
 
 # In[224]:
 
 
-df.hist(figsize=(8, 8));
+from noshow.histogram import histograms, plot_histograms, plot_split
+
+#Counts per value of every numeric column, show-ups and no-shows apart, in one pass;
+#only the bin counts are passed to matplotlib
+hists = histograms(df)
+plot_histograms(hists, figsize=(8, 8));
 
 
 # - I believe that the most important thing here is that there are more people who attend than those who do not.
@@ -138,9 +127,7 @@ df.hist(figsize=(8, 8));
 # In[225]:
 
 
-df.age[df.no_show == 0].hist(alpha=0.5, label='show up')
-df.age[df.no_show == 1].hist(alpha=0.5, label='no show')
-plt.legend();
+plot_split(hists['age']);
 
 
 # - Primary look
@@ -164,7 +151,9 @@ df.loc[df['age'] < 0]
 # In[228]:
 
 
-df.drop(df.index[99832], inplace=True)
+#Rows failing the rules of noshow.validate, this one included, are
+#quarantined by noshow.clean when the frame is built
+df.shape
 
 
 # In[229]:
@@ -182,10 +171,11 @@ df.describe().age
 # In[231]:
 
 
-bin_edges = [0, 9, 16, 25, 35, 50, 65, 75, 115]
-bin_names = ['0 - 9', '10 - 16', '17 - 25', '26 - 35', '36 - 50', '51 - 65', '65 - 75', '76 - 115']
+from noshow.agebins import bin_ages
 
-df['age_stages'] = pd.cut(df['age'], bin_edges, labels=bin_names)
+#Both age schemes of this section from one lookup (see noshow.agebins)
+stages = bin_ages(df['age'], ['age_groups', 'age_stages'])
+df['age_stages'] = stages['age_groups'].rename('age_stages')
 
 df.head()
 
@@ -211,23 +201,13 @@ df.isnull().sum()
 df[df.age_stages.isnull()].head()
 
 
-# - For some reason these data are not entering the groups.
-#     - The zero will be replaced by a near and negative value.
+# - With pd.cut and a 0 edge the zero ages were not entering the groups.
+#     - The schemes start at whole ages, so age 0 is in the first group.
 
 # In[235]:
 
 
-bin_edges = [-0.1, 9, 16, 25, 35, 50, 65, 75, 115]
-bin_names = ['Child(0-9)', 
-             'Adolescent(10-16)', 
-             'Young(17 - 25)', 
-             'Adult(26-35)', 
-             'Mature(36-50)', 
-             'Ageing(51-65)', 
-             'Old(65-75)', 
-             'Elderly(76-115)']
-
-df['age_stages'] = pd.cut(df['age'], bin_edges, labels=bin_names)
+df['age_stages'] = stages['age_stages']
 
 df.head()
 
@@ -241,13 +221,17 @@ df.isnull().sum()
 # In[237]:
 
 
+from noshow.cube import build_cube
+
+#Appointments and no-shows of every breakdown below, counted in one pass
+cube = build_cube(df)
 df.no_show.sum()
 
 
 # In[238]:
 
 
-df_age = (df.groupby('age_stages').sum().no_show / df.no_show.sum())*100
+df_age = cube.rates('age_stages').share
 df_age
 
 
@@ -264,28 +248,17 @@ df_age.plot(kind='bar');
 # In[240]:
 
 
-df_neigh = (df.groupby('neighbourhood').sum().no_show / df.no_show.sum())*100
+df_neigh = cube.rates('neighbourhood').share
 df_neigh.describe()
 
 
-# In[241]:
-
-
-type(df_neigh)
-
-
 # In[242]:
 
 
-a = df_neigh.sum() - df_neigh.nlargest(5).sum() #TOP 5 neighbourhoods
-a
-
+from noshow.topk import top_k
 
-# In[243]:
-
-
-df_neigh = df_neigh.nlargest(5)
-df_neigh = df_neigh.append(pd.Series(a, index=['OTHERS']))
+#TOP 5 neighbourhoods picked without sorting all of them, the rest summed as 'OTHERS'
+df_neigh = top_k(df_neigh, 5)
 df_neigh
 
 
@@ -305,40 +278,13 @@ df_neigh.plot.pie(y='neighborhood', figsize=(8, 8));
 # In[245]:
 
 
-M = df[df['gender'] == 'M'].shape
-M[0]
-
-
-# In[246]:
-
-
-F = df[df['gender'] == 'F'].shape
-F[0]
-
-
-# In[247]:
-
-
-df_gen = df.groupby('gender').sum().no_show
-df_gen
-
-
-# In[248]:
-
-
-(df_gen[0]/F[0])*100
-
-
-# In[249]:
-
-
-(df_gen[1]/M[0])*100
+cube['gender']
 
 
 # In[250]:
 
 
-df_gen = pd.Series([(df_gen[0]/F[0])*100, (df_gen[1]/M[0])*100], index=['Female', 'Male'])
+df_gen = cube.rates('gender').rate.rename({'F': 'Female', 'M': 'Male'})
 df_gen
 
 
@@ -357,28 +303,13 @@ df_gen.plot(kind='bar');
 # In[252]:
 
 
-a = df[df['sms_received'] == 1].shape
-a[0]
-
-
-# In[253]:
-
-
-b = df[df['sms_received'] == 0].shape
-b[0]
-
-
-# In[254]:
-
-
-df_sms = df.groupby('sms_received').sum().no_show
-df_sms
+cube['sms_received']
 
 
 # In[255]:
 
 
-df_sms = pd.Series([(df_sms[1]/a[0])*100, (df_sms[0]/b[0])*100], index=['Not Received', 'Received'])
+df_sms = cube.rates('sms_received').rate.rename({0: 'Not Received', 1: 'Received'})
 df_sms
 
 
@@ -388,36 +319,35 @@ df_sms
 df_sms.plot(kind='bar');
 
 
-# - Here, there is a reduction in the rate of non-attendance by almost 11% among people who received SMS.
+# - Here, the rate of non-attendance is about 11 percentage points higher among people who received SMS (27.6% against 16.7%, about 65% higher in relative terms).
+#     - The first version of this cell had the two labels swapped and read it as a reduction.
 
-# ### People receiving Bolsa Família show up more?
-# >The same proportion adjustment was made in this section
-
-# In[257]:
+# In[ ]:
 
 
-a = df[df['scholarship'] == 1].shape
-a[0]
+from noshow.stats import bootstrap_tables
 
+#95% intervals of every rate: closed-form Wilson for one table, and a
+#bootstrap of all breakdowns at once from their counts (see noshow.stats)
+intervals = bootstrap_tables({name: cube[name] for name in cube})
+intervals['sms_received'][['rate', 'rate_low', 'rate_high']]
 
-# In[258]:
 
+# - The two intervals are far apart, so the gap is not an effect of the sample.
 
-b = df[df['scholarship'] == 0].shape
-b[0]
-
+# ### People receiving Bolsa Família show up more?
+# >The same proportion adjustment was made in this section
 
-# In[259]:
+# In[257]:
 
 
-df_scholar = df.groupby('scholarship').sum().no_show
-df_scholar
+cube['scholarship']
 
 
 # In[260]:
 
 
-df_scholar = pd.Series([(df_scholar[0]/b[0])*100, (df_scholar[1]/a[0])*100], index=['Not Received', 'Received'])
+df_scholar = cube.rates('scholarship').rate.rename({0: 'Not Received', 1: 'Received'})
 df_scholar
 
 
@@ -433,23 +363,30 @@ df_scholar.plot(kind='bar');
 # In[262]:
 
 
-df_han = df.groupby('handcap').sum().no_show
+from noshow.rates import level_rates
+
+#Every disability count from 0 to the highest one in the data, in one pass
+df_han = level_rates(df, 'handcap')
 df_han
 
 
 # - There are many more people who do not have some kind of disability.
 
-# In[263]:
+# In[ ]:
 
 
-df[df['handcap'] == 0].count().no_show
+from noshow.stats import with_wilson
 
+#Levels 3 and 4 have very few appointments, their rates are much less certain
+with_wilson(df_han[['count', 'no_show']])[['count', 'rate', 'rate_low', 'rate_high']]
+
+
+# - The intervals do not support a trend: level 1 (16.2-19.6%) is below level 0 (20.0-20.5%), and levels 3 and 4 span roughly 6-79%.
 
 # In[264]:
 
 
-for i in range(5):
-    df_han[i] = (df_han[i] / df[df['handcap'] == i].count().no_show)*100
+df_han = df_han.rate
 df_han
 
 
@@ -496,16 +433,12 @@ df.scheduledday.max() - df.scheduledday.min()
 
 # - Here we have an incompatibility.
 #     - Since the "appointment day" column has no time, there are probably appointments scheduled on the same day, but all data was recorded at the end of the day.
-#     - So for a better understanding, let's add 23:59 hours to all data.
+#     - So for a better understanding, 23:59 hours are added to all data.
 
 # In[270]:
 
 
-appointmentday = []
-for value in df.appointmentday:
-    value += pd.Timedelta('+23:59:00')
-    appointmentday.append(value)
-df['appointmentday'] = appointmentday
+#Done by noshow.clean.end_of_day when the frame is cleaned, on the whole column at once
 df.appointmentday.head()
 
 
@@ -522,76 +455,75 @@ df.appointmentday.max() - df.scheduledday.min()
 # In[272]:
 
 
-df['apmonth'] = df.appointmentday.dt.month
-df['scmonth'] = df.scheduledday.dt.month
+#apmonth and scmonth are added when the frame is cleaned
 df.head()
 
 
 # In[273]:
 
 
-df_sc = df.groupby('scmonth').sum().no_show
-#df_sc = pd.DataFrame(df_sc)
+from noshow.timeseries import period_rates
+
+#Appointments and no-shows per month of scheduling, over the whole span of the data
+df_sc = period_rates(df, 'scheduledday', freq='M')
 df_sc
 
 
-# In[274]:
+# In[277]:
 
 
-sc = []
-for i in range(1,7):
-    sc.append(df[df['scmonth'] == i].count().no_show)
-for i in range(11,13):
-    sc.append(df[df['scmonth'] == i].count().no_show)
-sc
+df_sch = df_sc[['rate']].rename(columns={'rate': 'No-show Percentage'})
+df_sch.index = df_sch.index.strftime('%b/%y')
+df_sch
 
 
-# In[275]:
+# In[278]:
 
 
-df_sch = (df_sc.values / sc)*100
-df_sch
+df_sch.plot(kind='bar');
 
 
-# In[276]:
+# - Percentage of attendances in relation to the number of appointments scheduled in each month.
+#     - In Nov / 15, there was an attendance in the single appointment scheduled that month, resulting in 0%
 
+# ### Does the waiting time between scheduling and appointment matter?
 
-df_sch = pd.DataFrame(df_sch, index=['03', '04', '05', '06', '07', '08', '01', '02'], columns=['No-show Percentage'])
-df_sch
+# In[282]:
 
 
-# In[277]:
+#lead_days (whole days from scheduling to appointment) and lead_stages are added when the frame is cleaned
+df.lead_days.describe()
 
 
-df_sch = df_sch.sort_index()
-labels = ['Nov/15', 'Dec/15', 'Jan/16', 'Feb/16', 'Mar/16', 'Apr/16', 'May/16', 'Jun/16']
-df_sch.index = labels
-df_sch
+# In[283]:
 
 
-# In[278]:
+df_lead = cube.rates('lead_stages')
+df_lead
 
 
-df_sch.plot(kind='bar');
+# In[284]:
 
 
-# - Percentage of attendances in relation to the number of appointments scheduled in each month.
-#     - In Nov / 15, there was an attendance in the single appointment scheduled that month, resulting in 0%
+df_lead.rate.plot(kind='bar');
+
+
+# - Same-day appointments are almost always attended: their no-show rate is 4.6%, and they make 8.0% of all no-shows.
+# - From one day on the no-show rate climbs with the wait and peaks above 30% between two weeks and two months; longer waits come down again (28.8% at 61-90 days, 25.8% over 90 days).
 
 # ### What about hipertesion, diabetes and alcoholic people?
 
 # In[279]:
 
 
-df_des = (df.groupby(['hipertension', 'diabetes', 'alcoholism']).sum().no_show / 
-        df.groupby(['hipertension', 'diabetes', 'alcoholism']).count().no_show)*100
+df_des = cube.rates('comorbidity').rate
 df_des
 
 
 # In[280]:
 
 
-df.groupby(['hipertension', 'diabetes', 'alcoholism']).count().no_show
+cube['comorbidity']['count']
 
 
 # In[281]:
@@ -610,18 +542,18 @@ df_des.plot(kind='bar');
 #    
 #    - Although women schedule much more consultations, gender is not a factor in the issue of attendance.
 #    
-#    - People who receive prior SMS tend to attend more.
+#    - People who receive prior SMS tend **not** to attend.
 #    
 #    - People who receive Family Grant assistance tend **not** to attend.
 #    
-#    - People with more deficiencies tend **not** to attend.
+#    - The number of deficiencies shows no clear effect: level 1 misses less than level 0, and levels 3 and 4 are too few to tell (95% intervals of roughly 6 to 79%).
 #    
 #    - Although the number of appointments scheduled increase over the months, with the peak in May, the percentage of people who do not appear is **decreasing**.
 #    
 #    - There are a large number of people with hypertension, diabetes and alcohol problems. Given the proportions, 17 to 20% of people who have none or all three types of problems tend **not** to attend.
 #    
 # #### Sugestions
-#  - The main suggestion is to send more alerts by SMS and maybe other types of alerts can also be created.
+#  - Sending more SMS alerts is not supported by these data: people who received one missed more. SMS probably go to appointments booked further ahead, which are missed more anyway (see the lead-time section), so their effect should be tested, e.g. by sending them to a random part of the patients, before relying on them; other types of alerts can also be tried.
 #  - In addition:
 #     - Alternative means of alerting people with disabilities may be considered.
 #     - Any kind of fee could be charged.
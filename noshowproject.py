@@ -3,56 +3,60 @@ Investigate Data
 Name: Lucas Amorim Bonini
 """
 
-import pandas as pd 
-import numpy as np 
-import matplotlib.pyplot as plt
+import argparse
+import sys
+
+from noshow import batch
+from noshow.agebins import bin_ages
+from noshow.cache import load_clean
+from noshow.profile import profile_frame
 
 #Definitions
+parser = argparse.ArgumentParser(description='Investigate the no-show appointments data')
+batch.add_arguments(parser)
+parser.add_argument('--batch', action='store_true',
+                    help='no prompts: analyse every input in parallel and write --output')
+parser.add_argument('--rebuild-cache', action='store_true',
+                    help='parse and clean the CSV again instead of using the cached frame')
+args = parser.parse_args()
+
+####Batch mode####
+#For cron and many files at once (see noshow.batch)
+if args.batch:
+    sys.exit(batch.run(args))
+
+#The interactive analysis reads one input; the other batch options would do nothing
+if len(args.inputs) > 1:
+    parser.error('only one input without --batch')
+ignored = [name for name in ('output', 'jobs', 'chunksize', 'combine', 'profile')
+           if getattr(args, name) != parser.get_default(name)]
+if ignored:
+    parser.error(', '.join('--' + name for name in ignored) + ' only apply with --batch')
 
 
 ####Load data####
-df = pd.read_csv("noshow.csv")
+#Typed read and cleaning, cached next to the CSV (see noshow.cache).
+#Without an input, noshow.csv or else the archives it ships in are read
+df = load_clean(args.inputs[0] if args.inputs else None, rebuild=args.rebuild_cache)
 
 ####Acessing Data#### 
 
-print(df.head())
+#dtype, nulls, distinct count, min/max, top values and memory of every
+#column in one pass (see noshow.profile), instead of head(), info(),
+#nunique() and describe() each walking the columns again
+profile = profile_frame(df)
+print(profile.table())
 input("\nPress Enter to continue... \n")
 
 #print(df.shape)
 #(110527, 14)
 
-print(df.info())
-input("\nPress Enter to continue... \n")
-
-print(df.nunique())
-input("\nPress Enter to continue... \n")
-
 ####Cleaning####
 
-#Drop PatientID and AppointmentID
-df.drop(['PatientId', 'AppointmentID'], axis=1, inplace=True)
-
-#Rename Columns
-df.rename(columns=lambda x: x.lower(), inplace=True)
-df.rename(index=str, columns={"no-show": "no_show"}, inplace=True)
-
-print('**Droped and Renamed Columns**')
-input("Press Enter to continue...\n")
-
-#Change Data Type
-
-df['no_show'] = df.no_show.replace({'Yes': True, 'No': False})
-#df['gender'] = df.gender.replace({'M': 1, 'F': 0})
-
-df['scheduledday'] = pd.to_datetime(df.scheduledday)
-df['appointmentday'] = pd.to_datetime(df.appointmentday)
-
-print(df.nunique())
-input("\nPress Enter to continue... \n")
-
-
-print('**Data Type fixed**')
-input("Press Enter to continue... \n\n")
+#Dropping the IDs, renaming, the Yes/No replace, to_datetime and the
+#rows failing validation (see noshow.validate) are all done by
+#noshow.loader and noshow.clean,
+#so the profile above is already that of the clean data
 
 
 #confirm
@@ -61,13 +65,12 @@ print(df.head(20))
 input("\nPress Enter to continue... \n")
 
 ###Age####
-print(df.describe().age)
-
-bin_edges = [-1, 18, 35, 60, 90, 120]
-bin_names = ['Unborn - 18', '18 - 35', '35 - 60', '60 - 90', '90 - 120']
+#The frame is in memory, so the summary is the exact one
+print(df['age'].describe())
 
-df['age_stages'] = pd.cut(df['age'], bin_edges, labels=bin_names)
+#The 0-18, ..., 90-120 bands, binned by lookup table (see noshow.agebins)
+df['age_stages'] = bin_ages(df['age'], 'age_bands').rename('age_stages')
 
 print(df.no_show.sum())
 
-print(df.groupby('age_stages').sum().no_show)
+print(df.groupby('age_stages', observed=False).no_show.sum())
@@ -0,0 +1,95 @@
+"""
+The merges of counts are exact
+
+Streamed tables equal the in-memory tables, per-file tables merged
+equal the tables of the whole file, and the incremental state equals a
+full recompute. Checked on slices of noshow.csv, one of them missing
+the young age stages.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from noshow.archive import open_source  # noqa: E402
+from noshow.batch import analyse, combine  # noqa: E402
+from noshow.clean import clean  # noqa: E402
+from noshow.cube import build_cube  # noqa: E402
+from noshow.incremental import AggregateState  # noqa: E402
+from noshow.loader import load_noshow  # noqa: E402
+from noshow.rates import rate_tables  # noqa: E402
+from noshow.stream import stream_rates  # noqa: E402
+from noshow.timeseries import fill_span, period_table  # noqa: E402
+
+ARCHIVE = os.path.join(ROOT, 'send for evaluation', 'noshow.zip')
+ROWS = 6_000
+CHUNKSIZE = 500
+
+
+def assert_tables_equal(left, right):
+    assert sorted(left) == sorted(right)
+    for name in left:
+        pd.testing.assert_frame_equal(left[name], right[name], check_dtype=False,
+                                      check_index_type=False, obj=name)
+
+
+@pytest.fixture(scope='module')
+def raw():
+    if not os.path.exists(ARCHIVE):
+        pytest.skip(f'{ARCHIVE} is not there')
+    with open_source(ARCHIVE) as f:
+        return pd.read_csv(f, nrows=ROWS, dtype=str)
+
+
+@pytest.fixture(params=['all', 'aged 40 and over'])
+def source(request, raw, tmp_path):
+    rows = raw if request.param == 'all' else raw[raw['Age'].astype(int) >= 40]
+    path = tmp_path / 'slice.csv'
+    rows.to_csv(path, index=False)
+    return str(path)
+
+
+def _split(source, parts, tmp_path):
+    rows = pd.read_csv(source, dtype=str)
+    paths = []
+    for i in range(parts):
+        path = tmp_path / f'part{i}.csv'
+        rows.iloc[i * len(rows) // parts:(i + 1) * len(rows) // parts].to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+
+def test_streamed_equals_in_memory(source):
+    df = clean(load_noshow(source))
+    streamed = stream_rates(source, chunksize=CHUNKSIZE)
+    assert_tables_equal(streamed, rate_tables(df))
+    cube = build_cube(df)
+    assert_tables_equal(streamed, {name: cube[name] for name in cube})
+
+
+def test_merged_files_equal_whole_file(source, tmp_path):
+    whole = analyse(source, chunksize=CHUNKSIZE)
+    merged = combine([analyse(path, chunksize=CHUNKSIZE) for path in _split(source, 3, tmp_path)])
+    assert (merged['rows'], merged['no_show']) == (whole['rows'], whole['no_show'])
+    assert_tables_equal({name: merged['cube'][name] for name in merged['cube']},
+                        {name: whole['cube'][name] for name in whole['cube']})
+
+
+def test_incremental_equals_full_recompute(source, tmp_path):
+    state = AggregateState()
+    for path in _split(source, 3, tmp_path):
+        assert state.apply(path, chunksize=CHUNKSIZE)
+    state.save(tmp_path / 'state.json')
+    state = AggregateState.load(tmp_path / 'state.json')
+
+    df = clean(load_noshow(source))
+    full = build_cube(df)
+    expected = {name: full[name] for name in full}
+    expected['month'] = fill_span(period_table(df, 'scheduledday', 'M'))
+    assert (state.rows, state.no_show) == (len(df), int(df['no_show'].sum()))
+    assert_tables_equal({name: state.cube[name] for name in state.cube}, expected)